@@ -0,0 +1,295 @@
+"""Benchmarks for the schedule hot paths on synthetic databases.
+
+Builds schedule databases with a realistic mix of recurrence types and times
+per-day lookups, month expansion, inserts and reminder scans. Before timing the
+agenda service, each size checks its day, range and search answers against the
+local store through an in-process server. Only schedule_core is imported, so it
+runs on a headless machine.
+
+    python benchmarks/bench_schedule.py --sizes 1000,10000,100000 --output results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule_core.conflicts import find_conflicts
+from schedule_core.connections import ConnectionManager
+from schedule_core.db import INSERT_EVENT_SQL, SCHEMA_VERSION, connect, event_values, load_reminder_rules, rules_on
+from schedule_core.freeslots import find_free_slots
+from schedule_core.recurrence import WEEKDAY_NAMES, RecurrenceRule
+from schedule_core.reminders import ReminderScheduler
+from schedule_core.remote import RemoteEventSource
+from schedule_core.search import search_events
+from schedule_core.service import LocalServer
+from schedule_core.store import EventStore
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+# (recurrence type, share of rows)
+RECURRENCE_MIX = [
+    ("None", 0.30),
+    ("Weekly (Specific Days)", 0.40),
+    ("Weekly", 0.15),
+    ("Daily", 0.05),
+    ("Monthly", 0.05),
+    ("Yearly", 0.05),
+]
+
+SEMESTER_START = date(2025, 2, 3)
+
+
+def synthetic_events(count, rng):
+    types = [t for t, _ in RECURRENCE_MIX]
+    weights = [w for _, w in RECURRENCE_MIX]
+    for i in range(count):
+        rec_type = rng.choices(types, weights)[0]
+        start = SEMESTER_START + timedelta(days=rng.randrange(-180, 180))
+        rec_end = ""
+        rec_days = ""
+        if rec_type != "None" and rng.random() < 0.8:
+            rec_end = (start + timedelta(weeks=rng.choice([8, 16, 52]))).isoformat()
+        if rec_type == "Weekly (Specific Days)":
+            rec_days = ",".join(sorted(rng.sample(WEEKDAY_NAMES[:5], rng.randint(1, 3)), key=WEEKDAY_NAMES.index))
+        yield event_values(start.isoformat(), f"Course {i % 5000}", f"{rng.randint(7, 19):02d}:{rng.choice([0, 15, 30, 45]):02d}",
+                           f"Room {rng.randint(100, 400)}", "", rng.choice(["Lecture", "Lab", "Exam", ""]),
+                           rec_type, rec_end, rec_days, rng.choice([None, None, 10, 15, 30]),
+                           rng.choice([None, 50, 75, 100]))
+
+
+def build_database(path, count, seed):
+    if os.path.exists(path):
+        return
+    conn = connect(path + ".tmp")
+    rng = random.Random(seed)
+    events = synthetic_events(count, rng)
+    while True:
+        batch = [row for _, row in zip(range(10000), events)]
+        if not batch:
+            break
+        with conn:
+            conn.executemany(INSERT_EVENT_SQL, batch)
+    conn.execute("ANALYZE")
+    conn.close()
+    os.replace(path + ".tmp", path)
+
+
+def measure(func, repeat):
+    # Returns the median wall time of repeat runs and the last result.
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def legacy_day_scan(conn, day):
+    # The original update_event_list: read everything, parse every row.
+    shown = 0
+    for ev in conn.execute("SELECT * FROM schedule"):
+        event_date = datetime.strptime(ev[1], '%Y-%m-%d').date()
+        if ev[7] in (None, "", "None"):
+            shown += event_date == day
+        elif event_date <= day:
+            shown += 1
+    return shown
+
+
+def legacy_reminder_scan(conn, now):
+    return conn.execute('''SELECT * FROM schedule
+        WHERE datetime(date || ' ' || time) BETWEEN datetime(?) AND datetime(?, '+30 minutes')
+        AND reminder_time IS NOT NULL
+    ''', (now, now)).fetchall()
+
+
+def check_service(server, path, store, days):
+    # The served schedule, read back through RemoteEventSource, must match the local
+    # store; a repeated request must be answered from the client cache via a 304.
+    def ids(rules):
+        return sorted(rule.id for rule in rules)
+
+    def pairs(occurrences):
+        return sorted((day, rule.id) for day, rule in occurrences)
+    remote = RemoteEventSource(server.url)
+    for day in days:
+        if ids(remote.on_date(day)) != ids(store.on_date(day)):
+            raise AssertionError(f"/day/{day} differs from the store")
+    first, last = days[0], days[0] + timedelta(days=41)
+    if pairs(remote.between(first, last)) != pairs(store.between(first, last)):
+        raise AssertionError("/range differs from the store")
+    conn = sqlite3.connect(path)
+    expected = [tuple(row) for row in search_events(conn, "course 42")]
+    conn.close()
+    if remote.search("course 42")[0] != expected:
+        raise AssertionError("/search differs from search_events")
+    cached = remote.get(f"/day/{days[0].isoformat()}")
+    if remote.get(f"/day/{days[0].isoformat()}") is not cached:
+        raise AssertionError("repeated /day request was not revalidated with a 304")
+
+
+def run_size(path, rows, repeat, legacy):
+    conn = sqlite3.connect(path)
+    days = [SEMESTER_START + timedelta(days=offset) for offset in range(0, 70, 7)]
+    results = []
+
+    def record(name, seconds, **extra):
+        results.append(dict(rows=rows, benchmark=name, seconds=seconds, **extra))
+
+    store = EventStore(conn)
+    seconds, _ = measure(store.load, repeat)
+    record("store_load", seconds)
+
+    def uncached_days():
+        store.day_cache.clear()
+        return sum(len(store.on_date(day)) for day in days)
+    seconds, found = measure(uncached_days, repeat)
+    record("day_lookup_store", seconds / len(days), occurrences=found // len(days))
+
+    seconds, found = measure(lambda: sum(len(rules_on(conn, day)) for day in days), repeat)
+    record("day_lookup_sql", seconds / len(days), occurrences=found // len(days))
+
+    if legacy:
+        seconds, _ = measure(lambda: legacy_day_scan(conn, days[0]), repeat)
+        record("day_lookup_legacy_scan", seconds)
+
+    first = SEMESTER_START.replace(day=1)
+    seconds, found = measure(lambda: store.between(first - timedelta(days=7), first + timedelta(days=42)), repeat)
+    record("month_expansion", seconds, occurrences=len(found))
+
+    candidate = RecurrenceRule.from_row((None, SEMESTER_START.isoformat(), "New course", "10:00", "Room 101", "", "",
+                                         "Weekly (Specific Days)", (SEMESTER_START + timedelta(weeks=16)).isoformat(),
+                                         "Monday,Wednesday", None, 100))
+
+    def semester_conflicts():
+        store.day_cache.clear()
+        return find_conflicts(store, candidate)
+    seconds, found = measure(semester_conflicts, repeat)
+    record("conflict_check_semester", seconds, conflicts=len(found))
+
+    def free_slots_month():
+        store.day_cache.clear()
+        return find_free_slots(store, SEMESTER_START, SEMESTER_START + timedelta(days=27), 60, location="Room 101")
+    seconds, found = measure(free_slots_month, repeat)
+    record("free_slots_month", seconds, slots=len(found))
+
+    now = datetime.combine(SEMESTER_START, datetime.min.time()).replace(hour=9)
+    seconds, rules = measure(lambda: load_reminder_rules(conn, SEMESTER_START), repeat)
+    record("reminder_query", seconds, matched=len(rules))
+    scheduler = ReminderScheduler(lambda due: None)
+    seconds, _ = measure(lambda: scheduler.load(rules), repeat)
+    record("reminder_heap_build", seconds, entries=len(scheduler.heap))
+    if legacy:
+        seconds, _ = measure(lambda: legacy_reminder_scan(conn, now.strftime("%Y-%m-%d %H:%M")), repeat)
+        record("reminder_legacy_scan", seconds)
+
+    rng = random.Random(rows)
+    batch = list(synthetic_events(1000, rng))
+
+    def insert_batch():
+        with conn:
+            conn.executemany(INSERT_EVENT_SQL, batch)
+        with conn:
+            conn.execute("DELETE FROM schedule WHERE id > ?", (rows,))
+    seconds, _ = measure(insert_batch, repeat)
+    record("insert_batch_1000", seconds)
+
+    def insert_single():
+        for values in batch[:50]:
+            conn.execute(INSERT_EVENT_SQL, values)
+            conn.commit()
+        with conn:
+            conn.execute("DELETE FROM schedule WHERE id > ?", (rows,))
+    seconds, _ = measure(insert_single, repeat)
+    record("insert_single_commit", seconds / 50)
+    conn.close()
+
+    # The same 50 single-row writes queued on the app's writer, which commits them together.
+    db = ConnectionManager(path, migrate=False)
+
+    def insert_queued():
+        futures = [db.execute(INSERT_EVENT_SQL, values) for values in batch[:50]]
+        for future in futures:
+            future.result()
+        db.execute("DELETE FROM schedule WHERE id > ?", (rows,)).result()
+    seconds, _ = measure(insert_queued, repeat)
+    record("insert_single_queued", seconds / 50)
+
+    db.close()
+
+    # The agenda service on loopback, over one kept-alive connection.
+    with LocalServer(path) as server:
+        check_service(server, path, store, days)
+        client = http.client.HTTPConnection(server.host, server.port)
+
+        def get_day(etag=None):
+            client.request("GET", f"/day/{days[0].isoformat()}", headers={'If-None-Match': etag} if etag else {})
+            response = client.getresponse()
+            response.read()
+            return response.getheader('ETag')
+        etag = get_day()
+        seconds, _ = measure(get_day, repeat)
+        record("service_day_request", seconds)
+        seconds, _ = measure(lambda: get_day(etag), repeat)
+        record("service_day_not_modified", seconds)
+        client.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES[:3])),
+                        help="comma-separated row counts (default: %(default)s; add 1000000 for the 1M run)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per benchmark; the median is reported")
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), "schedule-bench"),
+                        help="where synthetic databases are built and reused (default: %(default)s)")
+    parser.add_argument('--no-legacy', dest='legacy', action='store_false',
+                        help="skip the full-table-scan baselines")
+    parser.add_argument('--output', help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for rows in (int(size) for size in args.sizes.split(',')):
+        path = os.path.join(args.workdir, f"schedule-{rows}-{args.seed}-v{SCHEMA_VERSION}.db")
+        started = time.perf_counter()
+        build_database(path, rows, args.seed)
+        print(f"{rows} rows: database ready in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        for result in run_size(path, rows, args.repeat, args.legacy):
+            print(f"  {result['benchmark']:<24} {result['seconds'] * 1000:10.3f} ms", file=sys.stderr)
+            results.append(result)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
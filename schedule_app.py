@@ -1,17 +1,72 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from tkcalendar import Calendar, DateEntry
-import sqlite3
-from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+from tkcalendar import Calendar
+import queue
+import sys
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
 import threading
-import time
+
+from schedule_core import perf
+from schedule_core.archive import archive_finished
+from schedule_core.cli import build_parser, run
+from schedule_core.conflicts import find_conflicts
+from schedule_core.connections import ConnectionManager
+from schedule_core.db import (DB_PATH, EVENT_COLUMNS, INSERT_EVENT_SQL, UPDATE_EVENT_SQL,
+                              event_values, load_reminder_rules, validate_event)
+from schedule_core.freeslots import WORKDAYS, RangeDays, find_free_slots, format_minutes
+from schedule_core.ics import export_file, import_file, import_summary
+from schedule_core.prefetch import MonthPrefetcher, month_grid
+from schedule_core.recurrence import RecurrenceRule
+from schedule_core.reminders import ReminderScheduler
+from schedule_core.remote import RemoteEventSource
+from schedule_core.search import search_archive, search_events
+from schedule_core.store import EventStore, StoreSnapshot
+
+# -------------------- Background Work --------------------
+
+def run_in_background(widget, work, on_done, on_progress=None, interval=100):
+    # Runs work(report) on a daemon thread. Whatever it passes to report() is
+    # delivered to on_progress, and its result (or exception) to on_done(result, error),
+    # both on the Tk thread by polling a queue from widget.after.
+    messages = queue.Queue()
+
+    def target():
+        try:
+            messages.put(('done', work(lambda value: messages.put(('progress', value))), None))
+        except Exception as e:
+            messages.put(('done', None, e))
+
+    def poll():
+        while True:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                widget.after(interval, poll)
+                return
+            if message[0] == 'progress':
+                if on_progress:
+                    on_progress(message[1])
+            else:
+                on_done(message[1], message[2])
+                return
+
+    threading.Thread(target=target, daemon=True).start()
+    widget.after(interval, poll)
 
 # -------------------- Main Application Class --------------------
 
 class ScheduleApp:
-    def __init__(self, root):
+    TITLE = "College Schedule Reminder Pro"
+    TREE_CHUNK = 200
+    REMOTE_POLL_MS = 30000  # how often a served schedule is checked for changes
+
+    def __init__(self, root, db_path=DB_PATH, server=None):
         self.root = root
-        self.root.title("College Schedule Reminder Pro")
+        self.db_path = db_path
+        self.server = server
+        self.remote_version = None
+        self.root.title(self.TITLE if server is None else f"{self.TITLE} - {server}")
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)
         
@@ -53,35 +108,52 @@ class ScheduleApp:
                              background=self.colors['accent'],
                              foreground='white',
                              font=('Helvetica', 12, 'bold'))
+        # Event Manager styles
+        self.style.configure('Modal.TFrame', background='#FFFFFF')
+        self.style.configure('Modal.TLabel', background='#FFFFFF',
+                             foreground=self.colors['text'])
+        self.style.configure('Conflict.TLabel', background='#FFFFFF', foreground='#C0392B')
         
         # Initialize database and UI
+        self.event_manager = None
+        self.perf_window = None
+        self.tray = None
         self.init_database()
+        # Calendar lookups run on worker threads; answers come back through after().
+        self.prefetcher = MonthPrefetcher(lambda callback, *args: self.root.after(0, callback, *args), self.source)
         self.create_main_interface()
         self.start_notification_thread()
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def init_database(self):
-        self.conn = sqlite3.connect('college_schedule.db')
-        self.cursor = self.conn.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedule (
-                id INTEGER PRIMARY KEY,
-                date TEXT NOT NULL,
-                course TEXT NOT NULL,
-                time TEXT NOT NULL,
-                location TEXT NOT NULL,
-                notes TEXT,
-                category TEXT,
-                recurrence_type TEXT,
-                recurrence_end TEXT,
-                recurrence_days TEXT,
-                reminder_time INTEGER
-            )
-        ''')
-        self.conn.commit()
+        if self.server is not None:
+            # Read-only view of an agenda service: no local database and no editing.
+            self.db = self.conn = None
+            self.store = self.source = RemoteEventSource(self.server)
+            return
+        # All writes go through the manager's writer thread; self.conn is the Tk
+        # thread's read-only connection.
+        self.db = ConnectionManager(self.db_path)
+        self.conn = self.db.reader()
+        self.store = EventStore(self.conn)
+        self.store.load()
+        self.source = StoreSnapshot(self.store)
 
     def create_main_interface(self):
+        menubar = tk.Menu(self.root)
+        view_menu = tk.Menu(menubar, tearoff=0)
+        self.perf_var = tk.BooleanVar(value=perf.enabled)
+        view_menu.add_checkbutton(label="Record Performance", variable=self.perf_var,
+                                  command=lambda: perf.set_enabled(self.perf_var.get()))
+        view_menu.add_command(label="Performance Panel...", command=self.open_performance_panel)
+        menubar.add_cascade(label="View", menu=view_menu)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(label="Archive Past Events...", command=self.archive_events,
+                               state=tk.NORMAL if self.server is None else tk.DISABLED)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self.root.config(menu=menubar)
+
         main_frame = ttk.Frame(self.root)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
@@ -120,8 +192,12 @@ class ScheduleApp:
             headersfont=('Helvetica', 12, 'bold')
         )
         self.cal.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.cal.tag_config('event', background=self.colors['highlight'],
+                            foreground=self.colors['text'])
         self.cal.bind("<<CalendarSelected>>", self.on_calendar_change)
+        self.cal.bind("<<CalendarMonthChanged>>", self.on_month_change)
         self.update_month_year_label()
+        self.update_calendar_markers()
 
         # Event List Section with modern styling
         list_frame = ttk.Frame(main_frame)
@@ -138,6 +214,8 @@ class ScheduleApp:
             style='Event.Treeview',
             selectmode='browse'
         )
+        self.tree_values = {}  # iid -> values currently shown
+        self.tree_generation = 0
         for col in ["Time", "Course", "Location"]:
             self.event_tree.heading(col, text=col, anchor=tk.CENTER)
             self.event_tree.column(col, anchor=tk.CENTER, width=120)
@@ -152,132 +230,359 @@ class ScheduleApp:
         btn_frame = ttk.Frame(main_frame)
         btn_frame.grid(row=1, column=0, columnspan=2, pady=20)
         
-        ttk.Button(btn_frame, text="Manage Events", command=self.open_event_manager,
-                   style='Accent.TButton').pack(padx=10, ipadx=20, ipady=8)
+        local_only = tk.NORMAL if self.server is None else tk.DISABLED
+        ttk.Button(btn_frame, text="Manage Events", command=self.open_event_manager, state=local_only,
+                   style='Accent.TButton').pack(side=tk.LEFT, padx=10, ipadx=20, ipady=8)
+        ttk.Button(btn_frame, text="Find Free Time...", command=self.open_free_slots,
+                   style='TButton').pack(side=tk.LEFT, padx=10, ipadx=10, ipady=8)
+        ttk.Button(btn_frame, text="Export Calendar...", command=self.export_calendar, state=local_only,
+                   style='TButton').pack(side=tk.LEFT, padx=10, ipadx=10, ipady=8)
         
         self.update_event_list()
 
     def update_month_year_label(self):
-        date_str = self.cal.get_date()  # Expected format: YYYY-MM-DD
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            month_year_text = date_obj.strftime("%B %Y")
-            self.month_year_label.config(text=month_year_text,
-                                         foreground=self.colors['header'])
-        except Exception:
-            self.month_year_label.config(text="")
+        month, year = self.cal.get_displayed_month()
+        month_year_text = date(year, month, 1).strftime("%B %Y")
+        self.month_year_label.config(text=month_year_text,
+                                     foreground=self.colors['header'])
+
+    def update_calendar_markers(self):
+        month, year = self.cal.get_displayed_month()
+        self.prefetcher.request_month((year, month), self.apply_calendar_markers)
+
+    @perf.instrument('ui.apply_calendar_markers')
+    def apply_calendar_markers(self, by_day, error):
+        # Tag every day with events in the visible grid, including the spill-over
+        # days of the neighbouring months. Only the latest request is answered, so
+        # by_day belongs to the displayed month.
+        if error is not None and self.server is not None:
+            self.root.title(f"{self.TITLE} - {self.server} (unreachable)")
+            return
+        if error is not None:
+            month, year = self.cal.get_displayed_month()
+            by_day = {}
+            for day, rule in self.store.between(*month_grid((year, month))):
+                by_day.setdefault(day, []).append(rule)
+        self.cal.calevent_remove('all')
+        for day, rules in by_day.items():
+            self.cal.calevent_create(day, "\n".join(f"{rule.time} {rule.course}" for rule in rules), 'event')
 
     def on_calendar_change(self, event):
         self.update_month_year_label()
         self.update_event_list()
 
+    def on_month_change(self, event):
+        self.update_month_year_label()
+        self.update_calendar_markers()
+
+    def reload_events(self):
+        # After bulk changes (import, archive): the table and the reminder rules are
+        # read on a worker thread and swapped in here. Should an event be edited in
+        # the meantime, the result may predate that edit and the reload starts over.
+        edits = self.store.edits
+
+        def work(report):
+            conn = self.db.reader()
+            return self.store.build(conn), load_reminder_rules(conn)
+
+        def finished(result, error):
+            if error is not None:
+                messagebox.showerror("Error", f"Reloading events failed: {error}")
+                return
+            if self.store.edits != edits:
+                self.reload_events()
+                return
+            engine, rules = result
+            self.store.install(engine)
+            if self.event_manager is not None:
+                self.event_manager.list_cache.clear()
+            self.prefetcher.invalidate()
+            self.scheduler.load(rules)
+            self.update_event_list()
+            self.update_calendar_markers()
+
+        run_in_background(self.root, work, finished)
+
+    def event_changed(self, event_id):
+        rule = self.store.refresh(event_id)
+        self.prefetcher.invalidate()
+        if rule is not None:
+            self.scheduler.upsert(rule)
+        else:
+            self.scheduler.remove(event_id)
+        self.update_event_list()
+        self.update_calendar_markers()
+
+    def event_deleted(self, event_id):
+        self.store.discard(event_id)
+        self.prefetcher.invalidate()
+        self.scheduler.remove(event_id)
+        self.update_event_list()
+        self.update_calendar_markers()
+
     def update_event_list(self, event=None):
-        # Clear the event tree
-        for item in self.event_tree.get_children():
-            self.event_tree.delete(item)
-            
         selected_date_str = self.cal.get_date()  # Format: YYYY-MM-DD
-        selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d')
-        
-        # Retrieve all events from the database
-        self.cursor.execute("SELECT * FROM schedule")
-        rows = self.cursor.fetchall()
-        for ev in rows:
-            # ev indices:
-            # 0=id, 1=date, 2=course, 3=time, 4=location, 5=notes, 6=category,
-            # 7=recurrence_type, 8=recurrence_end, 9=recurrence_days, 10=reminder_time
-            event_date = datetime.strptime(ev[1], '%Y-%m-%d')
-            rec_type = ev[7]
-            show_event = False
-            if rec_type is None or rec_type.strip() == "" or rec_type == "None":
-                if event_date.date() == selected_date.date():
-                    show_event = True
+        selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
+        self.prefetcher.request_day(selected_date,
+                                    lambda rules, error: self.show_day(selected_date, rules, error))
+
+    @perf.instrument('ui.show_day')
+    def show_day(self, day, rules, error):
+        if error is not None and self.server is not None:
+            self.root.title(f"{self.TITLE} - {self.server} (unreachable)")
+            rules = ()
+        elif error is not None:
+            rules = self.store.on_date(day)
+        self.refresh_tree([(str(rule.id), (rule.time, rule.course, rule.location)) for rule in rules])
+
+    @perf.instrument('ui.refresh_tree')
+    def refresh_tree(self, rows):
+        # Brings event_tree in line with rows (already sorted by time), issuing only the
+        # delete/insert/item/move calls that differ from what is on screen. Large
+        # result sets are applied in chunks so the main loop keeps running.
+        self.tree_generation += 1
+        tree = self.event_tree
+        wanted = {iid for iid, _ in rows}
+        order = []
+        stale = []
+        for iid in tree.get_children():
+            (order if iid in wanted else stale).append(iid)
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                self.tree_values.pop(iid, None)
+        self.apply_tree_rows(rows, order, 0, tree.yview()[0], self.tree_generation)
+
+    def apply_tree_rows(self, rows, order, start, top, generation):
+        if generation != self.tree_generation:
+            return  # Superseded by a newer refresh.
+        tree = self.event_tree
+        stop = min(start + self.TREE_CHUNK, len(rows))
+        for index in range(start, stop):
+            iid, values = rows[index]
+            current = self.tree_values.get(iid)
+            if current is None:
+                tree.insert("", index, iid=iid, values=values)
+                order.insert(index, iid)
             else:
-                # Only show repeating events if the original event date is not later than the selected date.
-                if event_date.date() <= selected_date.date():
-                    if ev[8]:
-                        try:
-                            rec_end = datetime.strptime(ev[8], '%Y-%m-%d')
-                            if selected_date.date() > rec_end.date():
-                                show_event = False
-                            else:
-                                show_event = True
-                        except Exception:
-                            show_event = True
-                    else:
-                        show_event = True
-                    if rec_type == "Daily":
-                        show_event = True
-                    elif rec_type == "Weekly":
-                        if event_date.weekday() == selected_date.weekday():
-                            show_event = True
-                    elif rec_type == "Weekly (Specific Days)":
-                        days = [d.strip() for d in ev[9].split(',')] if ev[9] else []
-                        if selected_date.strftime('%A') in days:
-                            show_event = True
-                    elif rec_type == "Monthly":
-                        if event_date.day == selected_date.day:
-                            show_event = True
-                    elif rec_type == "Yearly":
-                        if event_date.month == selected_date.month and event_date.day == selected_date.day:
-                            show_event = True
-            if show_event:
-                self.event_tree.insert("", "end", iid=ev[0], values=(ev[3], ev[2], ev[4]))
+                if current != values:
+                    tree.item(iid, values=values)
+                if order[index] != iid:
+                    tree.move(iid, "", index)
+                    order.remove(iid)
+                    order.insert(index, iid)
+            self.tree_values[iid] = values
+        if stop < len(rows):
+            self.root.after_idle(self.apply_tree_rows, rows, order, stop, top, generation)
+        else:
+            tree.yview_moveto(top)
 
     def start_notification_thread(self):
-        def check_reminders():
-            # Use a separate connection for thread safety.
-            conn_thread = sqlite3.connect('college_schedule.db')
-            cursor_thread = conn_thread.cursor()
-            while self.running:
-                now = datetime.now().strftime("%Y-%m-%d %H:%M")
-                cursor_thread.execute('''SELECT * FROM schedule 
-                    WHERE datetime(date || ' ' || time) BETWEEN datetime(?) AND datetime(?, '+30 minutes')
-                    AND reminder_time IS NOT NULL
-                ''', (now, now))
-                for ev in cursor_thread.fetchall():
-                    self.root.after(0, lambda ev=ev: messagebox.showinfo(
-                        "Reminder", f"Upcoming: {ev[2]} at {ev[3]}\nLocation: {ev[4]}\nNotes: {ev[5]}"
-                    ))
-                    cursor_thread.execute("UPDATE schedule SET reminder_time = NULL WHERE id=?", (ev[0],))
-                    conn_thread.commit()
-                time.sleep(60)
-            conn_thread.close()
-        
-        self.running = True
-        thread = threading.Thread(target=check_reminders, daemon=True)
-        thread.start()
+        self.scheduler = ReminderScheduler(lambda due: self.root.after(0, self.show_reminders, due))
+        if self.server is None:
+            self.scheduler.load(load_reminder_rules(self.conn))
+        else:
+            self.poll_remote()
+        self.scheduler.start()
+
+    def poll_remote(self):
+        # Remote mode: the served /version changes whenever the data does. Then the
+        # reminders are reloaded and the cached months dropped; an unchanged version
+        # costs one 304.
+        def work(report):
+            version = self.source.version()
+            return version, self.source.reminder_rules() if version != self.remote_version else None
+
+        def finished(result, error):
+            self.root.after(self.REMOTE_POLL_MS, self.poll_remote)
+            if error is not None:
+                self.root.title(f"{self.TITLE} - {self.server} (unreachable)")
+                return
+            self.root.title(f"{self.TITLE} - {self.server}")
+            version, rules = result
+            if rules is None:
+                return
+            changed = self.remote_version is not None
+            self.remote_version = version
+            self.scheduler.load(rules)
+            if changed:
+                self.prefetcher.invalidate()
+                self.update_event_list()
+                self.update_calendar_markers()
+
+        run_in_background(self.root, work, finished)
+
+    def show_reminders(self, due):
+        # One batch per reminder window, shown in a non-modal tray.
+        if self.tray is None:
+            self.tray = ReminderTray(self)
+        self.tray.add(due)
+
+    def acknowledge_reminders(self, items):
+        # One-off reminders are consumed once dismissed; recurring ones keep firing.
+        # All dismissed one-offs are cleared in a single write job (one transaction).
+        consumed = [rule for rule, _ in items if rule.rec_type is None and rule.reminder is not None]
+        for rule in consumed:
+            rule.reminder = None
+        if consumed and self.db is not None:
+            ids = [(rule.id,) for rule in consumed]
+            self.db.write(lambda conn: conn.executemany("UPDATE schedule SET reminder_time = NULL WHERE id=?", ids))
 
     def open_event_manager(self):
-        EventManagerWindow(self)
+        # Built on first use, then hidden and shown again with a fresh form.
+        if self.event_manager is None:
+            self.event_manager = EventManagerWindow(self)
+        self.event_manager.show()
+
+    def open_free_slots(self):
+        FreeSlotWindow(self)
+
+    def open_performance_panel(self):
+        if self.perf_window is not None and self.perf_window.win.winfo_exists():
+            self.perf_window.win.lift()
+            return
+        self.perf_window = PerformanceWindow(self)
+
+    def export_calendar(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Export Calendar", defaultextension=".ics",
+            filetypes=[("iCalendar", "*.ics")])
+        if not path:
+            return
+
+        def work(report):
+            return export_file(self.db.reader(), path)
+
+        def finished(count, error):
+            if error is not None:
+                messagebox.showerror("Error", f"Export failed: {error}")
+            else:
+                messagebox.showinfo("Export", f"Exported {count} events.")
+
+        run_in_background(self.root, work, finished)
+
+    def archive_events(self):
+        if not messagebox.askyesno(
+                "Archive", "Move events that ended before today to the archive?\n"
+                           "They stay searchable from the Event Manager (Include archive)."):
+            return
+
+        def finished(moved, error):
+            if error is not None:
+                messagebox.showerror("Error", f"Archiving failed: {error}")
+                return
+            if moved:
+                self.reload_events()
+            messagebox.showinfo("Archive", f"Archived {moved} events.")
+
+        run_in_background(self.root, lambda report: archive_finished(self.db), finished)
 
     def on_closing(self):
-        self.running = False
-        self.conn.close()
+        self.scheduler.stop()
+        self.prefetcher.close()
+        if self.db is not None:
+            self.db.close()
         self.root.destroy()
 
 
 # -------------------- Event Management Window --------------------
 
+class DatePopup:
+    # An entry with a button that opens a tkcalendar picker. Unlike DateEntry the
+    # picker is only built when first opened, and then reused.
+    def __init__(self, parent, var, owner):
+        self.var = var
+        self.owner = owner  # the modal window that gets its grab back on close
+        self.top = None
+        ttk.Entry(parent, textvariable=var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.button = ttk.Button(parent, text="\u25BE", width=3, command=self.open)
+        self.button.pack(side=tk.LEFT, padx=(5, 0))
+
+    def open(self):
+        if self.top is None:
+            self.top = tk.Toplevel(self.owner)
+            self.top.withdraw()
+            self.top.overrideredirect(True)
+            self.calendar = Calendar(self.top, selectmode='day', date_pattern='y-mm-dd')
+            self.calendar.pack()
+            self.calendar.bind("<<CalendarSelected>>", self.pick)
+            self.top.bind("<Escape>", lambda event: self.close())
+            self.top.bind("<ButtonPress-1>", self.click)
+        try:
+            self.calendar.selection_set(datetime.strptime(self.var.get().strip(), '%Y-%m-%d').date())
+        except ValueError:
+            self.calendar.selection_set(date.today())
+        self.top.geometry(f"+{self.button.winfo_rootx()}+{self.button.winfo_rooty() + self.button.winfo_height()}")
+        self.top.deiconify()
+        self.top.lift()
+        self.top.grab_set()
+        self.top.focus_set()
+
+    def click(self, event):
+        # While the picker holds the grab, clicks elsewhere are reported here.
+        widget = self.top.winfo_containing(event.x_root, event.y_root)
+        if widget is None or widget.winfo_toplevel() is not self.top:
+            self.close()
+
+    def pick(self, event):
+        self.var.set(self.calendar.get_date())
+        self.close()
+
+    def close(self):
+        self.top.grab_release()
+        self.top.withdraw()
+        self.owner.grab_set()
+
+
 class EventManagerWindow:
+    SEARCH_DELAY = 250  # ms of typing pause before a search runs
+    CONFLICT_DELAY = 300  # ms after the last form edit before clashes are re-checked
+    LIST_CACHE_SIZE = 64  # dates whose event list is kept between update_listbox calls
+
     def __init__(self, parent_app):
         self.parent_app = parent_app
+        self.db = parent_app.db
         self.conn = parent_app.conn
         self.cursor = self.conn.cursor()
+        self.selected_event_id = None
+        self.list_cache = OrderedDict()  # date ordinal -> [(id, time, course)]
         
+        # Built once; show() and hide() are used from then on.
         self.win = tk.Toplevel(parent_app.root)
+        self.win.withdraw()
         self.win.title("Event Manager")
         self.win.geometry("800x600")
-        self.win.grab_set()  # Make the window modal
-        
-        # Modern styling for the modal window
-        self.style = ttk.Style()
-        self.style.configure('Modal.TFrame', background='#FFFFFF')
-        self.style.configure('Modal.TLabel', background='#FFFFFF', 
-                             foreground=parent_app.colors['text'])
+        self.win.protocol("WM_DELETE_WINDOW", self.hide)
         
         self.create_modern_interface()
 
+    def show(self):
+        self.reset_form()
+        self.win.deiconify()
+        self.win.lift()
+        self.win.grab_set()  # Make the window modal
+        self.win.focus_set()
+
+    def hide(self):
+        self.win.grab_release()
+        self.win.withdraw()
+
+    def reset_form(self):
+        self.selected_event_id = None
+        for var in self.vars.values():
+            var.set("")
+        self.vars["Date (YYYY-MM-DD):"].set(date.today().isoformat())
+        self.vars["Recurrence:"].set("None")
+        self.rec_end_var.set("")
+        for var in self.weekly_days_vars.values():
+            var.set(False)
+        self.weekly_frame.pack_forget()
+        self.search_var.set("")
+        self.archive_var.set(False)
+        self.status_var.set("")
+        self.conflict_var.set("")
+        self.update_listbox()
+
     def create_modern_interface(self):
         main_frame = ttk.Frame(self.win, style='Modal.TFrame', padding=20)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -287,18 +592,27 @@ class EventManagerWindow:
         header_frame.pack(fill=tk.X, pady=(0, 20))
         ttk.Label(header_frame, text="Event Manager", style='Header.TLabel').pack(side=tk.LEFT)
         
-        # Search Bar (optional)
+        # Search Bar: searches as you type (debounced), or immediately on Search/Enter
         search_frame = ttk.Frame(header_frame)
         search_frame.pack(side=tk.RIGHT)
-        ttk.Entry(search_frame, width=25).pack(side=tk.LEFT, padx=5)
-        ttk.Button(search_frame, text="Search", style='TButton').pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_after = None
+        self.search_generation = 0
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=25)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.run_search())
+        self.search_var.trace_add('write', self.schedule_search)
+        ttk.Button(search_frame, text="Search", command=self.run_search, style='TButton').pack(side=tk.LEFT)
+        self.archive_var = tk.BooleanVar()
+        ttk.Checkbutton(search_frame, text="Include archive", variable=self.archive_var,
+                        command=self.run_search).pack(side=tk.LEFT, padx=5)
         
         # Form Section with modern inputs
         form_frame = ttk.Frame(main_frame)
         form_frame.pack(fill=tk.X, pady=10)
         
         labels = [
-            "Date (YYYY-MM-DD):", "Course:", "Time (HH:MM):", "Location:",
+            "Date (YYYY-MM-DD):", "Course:", "Time (HH:MM):", "Duration (min):", "Location:",
             "Notes:", "Category:", "Reminder (min):", "Recurrence:"
         ]
         self.vars = {}
@@ -310,7 +624,7 @@ class EventManagerWindow:
         rec_end_frame.pack(fill=tk.X, pady=5)
         ttk.Label(rec_end_frame, text="Recurrence End (YYYY-MM-DD):", width=25, anchor=tk.W).pack(side=tk.LEFT)
         self.rec_end_var = tk.StringVar()
-        DateEntry(rec_end_frame, textvariable=self.rec_end_var, date_pattern='y-mm-dd').pack(side=tk.LEFT, fill=tk.X, expand=True)
+        DatePopup(rec_end_frame, self.rec_end_var, self.win)
         
         # Recurrence Specific Days (for "Weekly (Specific Days)")
         self.weekly_frame = ttk.Frame(main_frame)
@@ -323,6 +637,15 @@ class EventManagerWindow:
             chk = ttk.Checkbutton(self.weekly_frame, text=day[:3], variable=var)
             chk.pack(side=tk.LEFT, padx=2)
         self.weekly_frame.pack_forget()  # Hide by default
+
+        # Inline clash warning, re-checked whenever the slot fields change
+        self.conflict_var = tk.StringVar()
+        self.conflict_after = None
+        ttk.Label(main_frame, textvariable=self.conflict_var, style='Conflict.TLabel',
+                  wraplength=740, justify=tk.LEFT).pack(fill=tk.X)
+        for var in [self.vars["Date (YYYY-MM-DD):"], self.vars["Time (HH:MM):"], self.vars["Duration (min):"],
+                    self.vars["Recurrence:"], self.rec_end_var, *self.weekly_days_vars.values()]:
+            var.trace_add('write', self.schedule_conflict_check)
         
         # Action Buttons
         btn_frame = ttk.Frame(main_frame)
@@ -331,18 +654,20 @@ class EventManagerWindow:
             ("Add Event", self.add_event),
             ("Update Event", self.update_event),
             ("Delete Event", self.delete_event),
-            ("Close", self.win.destroy)
+            ("Import...", self.import_events),
+            ("Close", self.hide)
         ]
         for text, cmd in actions:
             ttk.Button(btn_frame, text=text, command=cmd, style='TButton').pack(side=tk.LEFT, padx=5, ipadx=10)
+        self.status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status_var, style='Modal.TLabel').pack(fill=tk.X)
         
         # Listbox to show events on the given date
-        ttk.Label(main_frame, text="Events on this date:", style='Modal.TLabel').pack(fill=tk.X, pady=5)
+        self.list_label = tk.StringVar(value="Events on this date:")
+        ttk.Label(main_frame, textvariable=self.list_label, style='Modal.TLabel').pack(fill=tk.X, pady=5)
         self.event_listbox = tk.Listbox(main_frame, height=5)
         self.event_listbox.pack(fill=tk.BOTH, expand=True)
         self.event_listbox.bind("<<ListboxSelect>>", self.load_selected_event)
-        
-        self.update_listbox()
 
     def create_modern_input(self, parent, label_text, row):
         frame = ttk.Frame(parent)
@@ -351,10 +676,10 @@ class EventManagerWindow:
         var = tk.StringVar()
         self.vars[label_text] = var
         if label_text == "Date (YYYY-MM-DD):":
-            DateEntry(frame, textvariable=var, date_pattern='y-mm-dd').pack(side=tk.LEFT, fill=tk.X, expand=True)
+            DatePopup(frame, var, self.win)
         elif label_text == "Time (HH:MM):":
             ttk.Entry(frame, textvariable=var).pack(side=tk.LEFT, fill=tk.X, expand=True)
-        else:
+        elif label_text != "Recurrence:":
             ttk.Entry(frame, textvariable=var).pack(side=tk.LEFT, fill=tk.X, expand=True)
         # For the Recurrence field, bind to show/hide weekly selector
         if label_text == "Recurrence:":
@@ -371,25 +696,89 @@ class EventManagerWindow:
             self.weekly_frame.pack_forget()
     
     def update_listbox(self):
+        if self.search_var.get().strip():
+            self.run_search()
+            return
+        self.list_label.set("Events on this date:")
         self.event_listbox.delete(0, tk.END)
         date_val = self.vars["Date (YYYY-MM-DD):"].get().strip()
-        self.cursor.execute("SELECT id, time, course FROM schedule WHERE date = ?", (date_val,))
-        self.events = self.cursor.fetchall()
+        try:
+            ordinal = datetime.strptime(date_val, '%Y-%m-%d').toordinal()
+        except ValueError:
+            ordinal = None
+        if ordinal is None:
+            self.events = []
+        elif ordinal in self.list_cache:
+            self.list_cache.move_to_end(ordinal)
+            self.events = self.list_cache[ordinal]
+        else:
+            self.cursor.execute("SELECT id, time, course FROM schedule WHERE start_ordinal = ? ORDER BY start_minutes",
+                                (ordinal,))
+            self.events = self.list_cache[ordinal] = self.cursor.fetchall()
+            if len(self.list_cache) > self.LIST_CACHE_SIZE:
+                self.list_cache.popitem(last=False)
         for ev in self.events:
             display = f"{ev[1]} - {ev[2]}"
             self.event_listbox.insert(tk.END, display)
     
+    def schedule_search(self, *args):
+        if self.search_after is not None:
+            self.win.after_cancel(self.search_after)
+        self.search_after = self.win.after(self.SEARCH_DELAY, self.run_search)
+
+    def run_search(self):
+        if self.search_after is not None:
+            self.win.after_cancel(self.search_after)
+            self.search_after = None
+        text = self.search_var.get().strip()
+        self.search_generation += 1
+        if not text:
+            self.update_listbox()
+            return
+        generation = self.search_generation
+        db = self.parent_app.db
+        include_archive = self.archive_var.get()
+
+        def work(report):
+            conn = db.reader()
+            return search_events(conn, text), search_archive(conn, text) if include_archive else []
+
+        run_in_background(self.parent_app.root, work,
+                          lambda results, error: self.show_search_results(results, error, generation), interval=20)
+
+    def show_search_results(self, results, error, generation):
+        # Results of a search the user has since typed past are dropped.
+        if generation != self.search_generation or not self.win.winfo_exists():
+            return
+        if error is not None:
+            self.list_label.set(f"Search failed: {error}")
+            return
+        rows, archived = results
+        self.list_label.set(f"Search results ({len(rows)}):" if not archived else
+                            f"Search results ({len(rows)}, {len(archived)} archived):")
+        self.event_listbox.delete(0, tk.END)
+        # Archived rows get no id: they are listed for reference but cannot be edited.
+        self.events = [(ev[0], ev[2], ev[3]) for ev in rows] + [(None, ev[2], ev[3]) for ev in archived]
+        for ev in rows:
+            self.event_listbox.insert(tk.END, f"{ev[1]} {ev[2]} - {ev[3]}")
+        for ev in archived:
+            self.event_listbox.insert(tk.END, f"{ev[1]} {ev[2]} - {ev[3]} (archived)")
+
     def load_selected_event(self, event):
         if not self.event_listbox.curselection():
             return
         index = self.event_listbox.curselection()[0]
         ev = self.events[index]
+        if ev[0] is None:
+            self.status_var.set("Archived events are read-only.")
+            return
         self.selected_event_id = ev[0]
-        self.cursor.execute("SELECT * FROM schedule WHERE id = ?", (self.selected_event_id,))
-        event_data = self.cursor.fetchone()
+        # A throwaway cursor: a half-read statement would pin this reader's WAL snapshot.
+        event_data = self.conn.execute(f"SELECT {EVENT_COLUMNS} FROM schedule WHERE id = ?",
+                                       (self.selected_event_id,)).fetchone()
         if event_data:
             # event_data indices: 0=id, 1=date, 2=course, 3=time, 4=location, 5=notes, 6=category,
-            # 7=recurrence_type, 8=recurrence_end, 9=recurrence_days, 10=reminder_time
+            # 7=recurrence_type, 8=recurrence_end, 9=recurrence_days, 10=reminder_time, 11=duration
             self.vars["Date (YYYY-MM-DD):"].set(event_data[1])
             self.vars["Course:"].set(event_data[2])
             self.vars["Time (HH:MM):"].set(event_data[3])
@@ -397,6 +786,7 @@ class EventManagerWindow:
             self.vars["Notes:"].set(event_data[5])
             self.vars["Category:"].set(event_data[6])
             self.vars["Reminder (min):"].set(str(event_data[10]) if event_data[10] is not None else "")
+            self.vars["Duration (min):"].set(str(event_data[11]) if event_data[11] is not None else "")
             self.vars["Recurrence:"].set(event_data[7] if event_data[7] else "None")
             self.rec_end_var.set(event_data[8])
             if event_data[7] == "Weekly (Specific Days)" and event_data[9]:
@@ -408,101 +798,401 @@ class EventManagerWindow:
                     var.set(False)
     
     def validate_fields(self):
-        date_val = self.vars["Date (YYYY-MM-DD):"].get().strip()
-        course = self.vars["Course:"].get().strip()
-        time_str = self.vars["Time (HH:MM):"].get().strip()
-        location = self.vars["Location:"].get().strip()
-        if not date_val or not course or not time_str or not location:
-            messagebox.showerror("Error", "Date, Course, Time, and Location are required.")
-            return False
-        try:
-            datetime.strptime(date_val, "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror("Error", "Date must be in YYYY-MM-DD format.")
-            return False
         try:
-            datetime.strptime(time_str, "%H:%M")
-        except ValueError:
-            messagebox.showerror("Error", "Time must be in HH:MM format (24-hour).")
+            validate_event(self.vars["Date (YYYY-MM-DD):"].get().strip(),
+                           self.vars["Course:"].get().strip(),
+                           self.vars["Time (HH:MM):"].get().strip(),
+                           self.vars["Location:"].get().strip(),
+                           self.vars["Reminder (min):"].get().strip(),
+                           self.vars["Duration (min):"].get().strip())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return False
         return True
-    
-    def add_event(self):
-        if not self.validate_fields():
-            return
-        date_val = self.vars["Date (YYYY-MM-DD):"].get().strip()
-        course = self.vars["Course:"].get().strip()
-        time_str = self.vars["Time (HH:MM):"].get().strip()
-        location = self.vars["Location:"].get().strip()
-        notes = self.vars["Notes:"].get().strip()
-        category = self.vars["Category:"].get().strip()
-        reminder = self.vars["Reminder (min):"].get().strip() or 0
+
+    def read_form(self):
+        # The form as event_values() arguments.
+        reminder = self.vars["Reminder (min):"].get().strip()
+        duration = self.vars["Duration (min):"].get().strip()
         rec_type = self.vars["Recurrence:"].get().strip()
-        rec_end = self.rec_end_var.get().strip()
         rec_days = ""
         if rec_type == "Weekly (Specific Days)":
             rec_days = ",".join([day for day, var in self.weekly_days_vars.items() if var.get()])
-        data = (date_val, course, time_str, location, notes, category, rec_type, rec_end, rec_days, reminder)
+        return (self.vars["Date (YYYY-MM-DD):"].get().strip(),
+                self.vars["Course:"].get().strip(),
+                self.vars["Time (HH:MM):"].get().strip(),
+                self.vars["Location:"].get().strip(),
+                self.vars["Notes:"].get().strip(),
+                self.vars["Category:"].get().strip(),
+                rec_type,
+                self.rec_end_var.get().strip(),
+                rec_days,
+                int(reminder) if reminder.isdigit() else None,
+                int(duration) if duration.isdigit() else None)
+
+    def find_form_conflicts(self, event_id):
+        candidate = RecurrenceRule.from_row((event_id,) + self.read_form())
+        if candidate is None:
+            return []
+        return find_conflicts(self.parent_app.store, candidate)
+
+    def show_conflicts(self, conflicts):
+        if not conflicts:
+            self.conflict_var.set("")
+            return
+        shown = "; ".join(f"{day} {rule.time} {rule.course} ({rule.location})" for day, rule in conflicts[:3])
+        more = f" and {len(conflicts) - 3} more" if len(conflicts) > 3 else ""
+        self.conflict_var.set(f"Clashes with: {shown}{more}")
+
+    def schedule_conflict_check(self, *args):
+        if self.conflict_after is not None:
+            self.win.after_cancel(self.conflict_after)
+        self.conflict_after = self.win.after(self.CONFLICT_DELAY, self.check_conflicts)
+
+    def check_conflicts(self):
+        self.conflict_after = None
+        self.show_conflicts(self.find_form_conflicts(self.selected_event_id))
+
+    def confirm_conflicts(self, event_id):
+        conflicts = self.find_form_conflicts(event_id)
+        self.show_conflicts(conflicts)
+        return not conflicts or messagebox.askyesno(
+            "Time Clash", f"This slot clashes with {len(conflicts)} existing occurrence(s). Save anyway?")
+    
+    def add_event(self):
+        if not self.validate_fields() or not self.confirm_conflicts(None):
+            return
+        data = event_values(*self.read_form())
         try:
-            self.cursor.execute('''
-                INSERT INTO schedule (date, course, time, location, notes, category, recurrence_type, recurrence_end, recurrence_days, reminder_time)
-                VALUES (?,?,?,?,?,?,?,?,?,?)
-            ''', data)
-            self.conn.commit()
+            event_id = self.db.execute(INSERT_EVENT_SQL, data).result()
+            self.list_cache.clear()
             messagebox.showinfo("Success", "Event added successfully.")
             self.update_listbox()
-            self.parent_app.update_event_list()
+            self.parent_app.event_changed(event_id)
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
     def update_event(self):
-        if not hasattr(self, "selected_event_id"):
+        if self.selected_event_id is None:
             messagebox.showwarning("Warning", "Select an event from the list first.")
             return
-        if not self.validate_fields():
+        if not self.validate_fields() or not self.confirm_conflicts(self.selected_event_id):
             return
-        date_val = self.vars["Date (YYYY-MM-DD):"].get().strip()
-        course = self.vars["Course:"].get().strip()
-        time_str = self.vars["Time (HH:MM):"].get().strip()
-        location = self.vars["Location:"].get().strip()
-        notes = self.vars["Notes:"].get().strip()
-        category = self.vars["Category:"].get().strip()
-        reminder = self.vars["Reminder (min):"].get().strip() or 0
-        rec_type = self.vars["Recurrence:"].get().strip()
-        rec_end = self.rec_end_var.get().strip()
-        rec_days = ""
-        if rec_type == "Weekly (Specific Days)":
-            rec_days = ",".join([day for day, var in self.weekly_days_vars.items() if var.get()])
-        data = (date_val, course, time_str, location, notes, category, rec_type, rec_end, rec_days, reminder, self.selected_event_id)
+        data = event_values(*self.read_form())
         try:
-            self.cursor.execute('''
-                UPDATE schedule SET date=?, course=?, time=?, location=?, notes=?, category=?, recurrence_type=?, recurrence_end=?, recurrence_days=?, reminder_time=?
-                WHERE id=?
-            ''', data)
-            self.conn.commit()
+            params = data + (self.selected_event_id,)
+            job = lambda conn: conn.execute(UPDATE_EVENT_SQL, params).rowcount
+            if not self.db.write(job).result():
+                self.event_missing()
+                return
+            self.list_cache.clear()
             messagebox.showinfo("Success", "Event updated successfully.")
             self.update_listbox()
-            self.parent_app.update_event_list()
+            self.parent_app.event_changed(self.selected_event_id)
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
     def delete_event(self):
-        if not hasattr(self, "selected_event_id"):
+        if self.selected_event_id is None:
             messagebox.showwarning("Warning", "Select an event from the list first.")
             return
         if messagebox.askyesno("Confirm", "Delete this event?"):
             try:
-                self.cursor.execute("DELETE FROM schedule WHERE id = ?", (self.selected_event_id,))
-                self.conn.commit()
+                params = (self.selected_event_id,)
+                job = lambda conn: conn.execute("DELETE FROM schedule WHERE id = ?", params).rowcount
+                if not self.db.write(job).result():
+                    self.event_missing()
+                    return
+                self.list_cache.clear()
                 messagebox.showinfo("Success", "Event deleted.")
                 self.update_listbox()
-                self.parent_app.update_event_list()
+                self.parent_app.event_deleted(self.selected_event_id)
+                self.selected_event_id = None
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
+    def event_missing(self):
+        # The selected row was removed behind our back, e.g. archived or deleted elsewhere.
+        messagebox.showerror("Error", "This event no longer exists.")
+        self.list_cache.clear()
+        self.parent_app.event_deleted(self.selected_event_id)
+        self.selected_event_id = None
+        self.update_listbox()
+
+    def import_events(self):
+        path = filedialog.askopenfilename(
+            parent=self.win, title="Import Events",
+            filetypes=[("Calendar files", "*.ics *.csv"), ("iCalendar", "*.ics"), ("CSV", "*.csv")])
+        if not path:
+            return
+        self.status_var.set("Importing...")
+
+        def work(report):
+            return import_file(self.parent_app.db, path, report)
+
+        run_in_background(self.parent_app.root, work, self.import_finished,
+                          lambda count: self.status_var.set(f"Imported {count} events..."))
+
+    def import_finished(self, stats, error):
+        self.list_cache.clear()
+        self.parent_app.reload_events()
+        if error is not None:
+            self.status_var.set("")
+            messagebox.showerror("Error", f"Import failed: {error}")
+            return
+        self.status_var.set(f"Imported {stats['imported']} events, skipped {stats['skipped']}.")
+        if stats['exceptions']:
+            messagebox.showwarning("Import", import_summary(stats), parent=self.win)
+        self.update_listbox()
+
+# -------------------- Reminder Tray --------------------
+
+class ReminderTray:
+    # Non-modal list of due reminders. Batches arriving while it is open are appended;
+    # snoozed entries come back through the scheduler, dismissed ones are acknowledged.
+    SNOOZE_MINUTES = 5
+
+    def __init__(self, parent_app):
+        self.parent_app = parent_app
+        self.items = []  # (rule, occurrence), in listbox order
+        self.win = tk.Toplevel(parent_app.root)
+        self.win.title("Reminders")
+        self.win.attributes('-topmost', True)
+        self.win.protocol("WM_DELETE_WINDOW", self.dismiss_all)
+
+        main_frame = ttk.Frame(self.win, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        self.title_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.title_var, style='Header.TLabel').pack(fill=tk.X)
+        self.listbox = tk.Listbox(main_frame, height=6, width=60, selectmode=tk.EXTENDED)
+        self.listbox.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X)
+        actions = [
+            (f"Snooze {self.SNOOZE_MINUTES} min", self.snooze),
+            ("Dismiss", self.dismiss),
+            ("Dismiss All", self.dismiss_all),
+        ]
+        for text, cmd in actions:
+            ttk.Button(btn_frame, text=text, command=cmd, style='TButton').pack(side=tk.LEFT, padx=5, ipadx=10)
+
+    def add(self, due):
+        shown = {(rule.id, occurrence) for rule, occurrence in self.items}
+        for rule, occurrence in due:
+            if (rule.id, occurrence) in shown:
+                continue
+            self.items.append((rule, occurrence))
+            location = f" - {rule.location}" if rule.location else ""
+            notes = f" ({rule.notes})" if rule.notes else ""
+            self.listbox.insert(tk.END, f"{occurrence.strftime('%a %H:%M')}  {rule.course}{location}{notes}")
+        self.update_title()
+        self.win.deiconify()
+        self.win.lift()
+        self.win.bell()
+
+    def update_title(self):
+        count = len(self.items)
+        self.title_var.set("1 upcoming event" if count == 1 else f"{count} upcoming events")
+
+    def take(self, indexes):
+        taken = [self.items[index] for index in indexes]
+        for index in sorted(indexes, reverse=True):
+            del self.items[index]
+            self.listbox.delete(index)
+        self.update_title()
+        if not self.items:
+            self.win.withdraw()
+        return taken
+
+    def selected(self):
+        # The selection, or every entry when nothing is selected.
+        return list(self.listbox.curselection()) or list(range(len(self.items)))
+
+    def snooze(self):
+        for rule, occurrence in self.take(self.selected()):
+            self.parent_app.scheduler.snooze(rule, occurrence, self.SNOOZE_MINUTES)
+
+    def dismiss(self):
+        self.parent_app.acknowledge_reminders(self.take(self.selected()))
+
+    def dismiss_all(self):
+        self.parent_app.acknowledge_reminders(self.take(list(range(len(self.items)))))
+
+# -------------------- Free Time Finder --------------------
+
+class FreeSlotWindow:
+    MAX_SLOTS = 500
+
+    def __init__(self, parent_app):
+        self.parent_app = parent_app
+        self.win = tk.Toplevel(parent_app.root)
+        self.win.title("Find Free Time")
+        self.win.geometry("520x520")
+
+        main_frame = ttk.Frame(self.win, padding=15)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        form_frame = ttk.Frame(main_frame)
+        form_frame.pack(fill=tk.X)
+
+        today = date.today()
+        self.vars = {}
+        fields = [
+            ("From (YYYY-MM-DD):", today.isoformat()),
+            ("To (YYYY-MM-DD):", (today + timedelta(weeks=3)).isoformat()),
+            ("Duration (min):", "60"),
+            ("Day starts (HH:MM):", "09:00"),
+            ("Day ends (HH:MM):", "17:00"),
+            ("Location:", ""),
+            ("Category:", ""),
+        ]
+        for row, (text, default) in enumerate(fields):
+            ttk.Label(form_frame, text=text, width=20, anchor=tk.W).grid(row=row, column=0, sticky=tk.W, pady=3)
+            var = tk.StringVar(value=default)
+            ttk.Entry(form_frame, textvariable=var).grid(row=row, column=1, sticky=tk.EW, pady=3)
+            self.vars[text] = var
+        form_frame.columnconfigure(1, weight=1)
+        self.workdays_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(form_frame, text="Weekdays only", variable=self.workdays_var).grid(
+            row=len(fields), column=1, sticky=tk.W, pady=3)
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X, pady=10)
+        self.find_button = ttk.Button(btn_frame, text="Find", command=self.find, style='TButton')
+        self.find_button.pack(side=tk.LEFT, padx=5, ipadx=10)
+        ttk.Button(btn_frame, text="Close", command=self.win.destroy, style='TButton').pack(side=tk.LEFT, padx=5, ipadx=10)
+        self.status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status_var).pack(fill=tk.X)
+        self.slot_listbox = tk.Listbox(main_frame, height=12)
+        self.slot_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
+
+    def read_minutes(self, label):
+        parsed = datetime.strptime(self.vars[label].get().strip(), '%H:%M')
+        return parsed.hour * 60 + parsed.minute
+
+    def find(self):
+        try:
+            first = datetime.strptime(self.vars["From (YYYY-MM-DD):"].get().strip(), '%Y-%m-%d').date()
+            last = datetime.strptime(self.vars["To (YYYY-MM-DD):"].get().strip(), '%Y-%m-%d').date()
+            day_start = self.read_minutes("Day starts (HH:MM):")
+            day_end = self.read_minutes("Day ends (HH:MM):")
+            duration = int(self.vars["Duration (min):"].get().strip())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid dates (YYYY-MM-DD), times (HH:MM) "
+                                 "and a duration in minutes.", parent=self.win)
+            return
+        if last < first or day_end <= day_start or duration <= 0:
+            messagebox.showerror("Error", "The range, day window and duration must not be empty.", parent=self.win)
+            return
+        weekdays = WORKDAYS if self.workdays_var.get() else range(7)
+        location = self.vars["Location:"].get().strip() or None
+        category = self.vars["Category:"].get().strip() or None
+        source = self.parent_app.source
+
+        def work(report):
+            # The whole range in one between() call (a single /range request in remote
+            # mode), starting a day early for events running past midnight.
+            days = RangeDays(source.between(first - timedelta(days=1), last))
+            return find_free_slots(days, first, last, duration, day_start, day_end, weekdays,
+                                   location, category, self.MAX_SLOTS)
+
+        self.find_button.config(state=tk.DISABLED)
+        self.status_var.set("Searching...")
+        run_in_background(self.parent_app.root, work, self.show_slots)
+
+    def show_slots(self, slots, error):
+        if not self.win.winfo_exists():
+            return
+        self.find_button.config(state=tk.NORMAL)
+        if error is not None:
+            self.status_var.set("")
+            messagebox.showerror("Error", str(error), parent=self.win)
+            return
+        self.slot_listbox.delete(0, tk.END)
+        for day, start, end in slots:
+            self.slot_listbox.insert(tk.END, f"{day.strftime('%a %Y-%m-%d')}   {format_minutes(start)} - "
+                                             f"{format_minutes(end)}   ({end - start} min)")
+        if not slots:
+            self.status_var.set("No free window found.")
+        elif len(slots) == self.MAX_SLOTS:
+            self.status_var.set(f"First {self.MAX_SLOTS} free windows:")
+        else:
+            self.status_var.set(f"{len(slots)} free windows:")
+
+# -------------------- Performance Panel --------------------
+
+class PerformanceWindow:
+    REFRESH_MS = 1000
+
+    def __init__(self, parent_app):
+        self.parent_app = parent_app
+        self.win = tk.Toplevel(parent_app.root)
+        self.win.title("Performance")
+        self.win.geometry("900x520")
+
+        main_frame = ttk.Frame(self.win, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        self.status = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.status).pack(fill=tk.X)
+
+        columns = ("Calls", "Rows", "p50 ms", "p95 ms", "p99 ms", "Max ms")
+        self.metric_tree = ttk.Treeview(main_frame, columns=columns, height=12)
+        self.metric_tree.heading("#0", text="Operation", anchor=tk.W)
+        self.metric_tree.column("#0", width=330)
+        for col in columns:
+            self.metric_tree.heading(col, text=col)
+            self.metric_tree.column(col, width=80, anchor=tk.E)
+        self.metric_tree.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        ttk.Label(main_frame, text="Slowest calls:").pack(fill=tk.X)
+        self.slow_list = tk.Listbox(main_frame, height=6)
+        self.slow_list.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X)
+        for text, cmd in [("Reset", self.reset), ("Dump JSON...", self.dump), ("Close", self.win.destroy)]:
+            ttk.Button(btn_frame, text=text, command=cmd, style='TButton').pack(side=tk.LEFT, padx=5, ipadx=10)
+
+        self.refresh()
+
+    def refresh(self):
+        if not self.win.winfo_exists():
+            return
+        data = perf.snapshot()
+        self.status.set("Recording" if data['enabled'] else
+                        f"Recording is off (View > Record Performance, or {perf.ENV_VAR}=1)")
+        self.metric_tree.delete(*self.metric_tree.get_children())
+        for name, m in sorted(data['metrics'].items(), key=lambda item: -item[1]['total']):
+            self.metric_tree.insert("", "end", text=name, values=(
+                m['count'], m['rows'], *(f"{m[key] * 1000:.2f}" for key in ('p50', 'p95', 'p99', 'max'))))
+        self.slow_list.delete(0, tk.END)
+        for call in data['slowest']:
+            rows = f", {call['rows']} rows" if call['rows'] is not None else ""
+            self.slow_list.insert(tk.END, f"{call['seconds'] * 1000:9.2f} ms  {call['name']}{rows}  ({call['at']})")
+        self.win.after(self.REFRESH_MS, self.refresh)
+
+    def reset(self):
+        perf.reset()
+
+    def dump(self):
+        path = filedialog.asksaveasfilename(parent=self.win, title="Save Performance Data",
+                                            defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if path:
+            perf.dump_json(path)
+
 # -------------------- Main Program --------------------
 
-if __name__ == "__main__":
+def main(argv=None):
+    # Without a command the GUI starts; commands are handled by schedule_core.cli.
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is not None:
+        return run(args, parser)
     root = tk.Tk()
-    app = ScheduleApp(root)
+    ScheduleApp(root, args.db, args.server)
     root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
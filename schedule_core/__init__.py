@@ -0,0 +1,40 @@
+# GUI-free core of College Schedule Reminder Pro: storage, recurrence matching,
+# reminders, import/export and search. Nothing here imports tkinter, and names
+# are resolved lazily so that e.g. the agenda command only loads what it uses.
+import importlib
+
+_EXPORTS = {
+    'RecurrenceRule': 'recurrence',
+    'RecurrenceEngine': 'recurrence',
+    'WEEKDAY_NAMES': 'recurrence',
+    'DB_PATH': 'db',
+    'connect': 'db',
+    'migrate_schema': 'db',
+    'event_values': 'db',
+    'validate_event': 'db',
+    'rules_on': 'db',
+    'load_reminder_rules': 'db',
+    'ConnectionManager': 'connections',
+    'EventStore': 'store',
+    'StoreSnapshot': 'store',
+    'ReminderScheduler': 'reminders',
+    'import_file': 'ics',
+    'export_file': 'ics',
+    'search_events': 'search',
+    'search_archive': 'search',
+    'archive_finished': 'archive',
+    'AgendaService': 'service',
+    'LocalServer': 'service',
+    'RemoteEventSource': 'remote',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
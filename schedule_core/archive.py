@@ -0,0 +1,41 @@
+from datetime import date, datetime
+
+from . import perf
+
+ARCHIVE_COLUMNS = ("id, date, course, time, location, notes, category, recurrence_type, recurrence_end, "
+                   "recurrence_days, reminder_time, duration, start_ordinal, last_ordinal")
+
+
+def archive_finished(db, before=None):
+    # Moves events whose last possible occurrence is before `before` (default: today)
+    # into schedule_archive: one-offs in the past and recurrences past their end.
+    # Open-ended recurrences never qualify. Returns the number of events moved.
+    # The move is one write job; compaction follows as a separate maintenance job.
+    cutoff = (before or date.today()).toordinal()
+    moved = db.write(lambda conn: _move(conn, cutoff)).result()
+    if moved:
+        db.maintain(compact).result()
+    return moved
+
+
+@perf.instrument('archive.move')
+def _move(conn, cutoff):
+    archived_at = datetime.now().isoformat(timespec='seconds')
+    conn.execute(f'''
+        INSERT INTO schedule_archive ({ARCHIVE_COLUMNS}, archived_at)
+        SELECT {ARCHIVE_COLUMNS}, ? FROM schedule WHERE last_ordinal < ?
+    ''', (archived_at, cutoff))
+    return conn.execute("DELETE FROM schedule WHERE last_ordinal < ?", (cutoff,)).rowcount
+
+
+@perf.instrument('archive.compact')
+def compact(conn):
+    # Returns freed pages to the file system and refreshes the planner statistics.
+    # Incremental vacuum needs auto_vacuum=INCREMENTAL, which an existing database
+    # only takes on after one full VACUUM; later runs just release the free pages.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    conn.execute("ANALYZE")
@@ -0,0 +1,148 @@
+import argparse
+import sys
+from datetime import datetime, date, timedelta
+
+from .connections import ConnectionManager
+from .db import DB_PATH
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+def parse_time(value):
+    try:
+        parsed = datetime.strptime(value, '%H:%M')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r} (expected HH:MM)")
+    return parsed.hour * 60 + parsed.minute
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="College Schedule Reminder Pro")
+    parser.add_argument('--db', default=DB_PATH, help="schedule database (default: %(default)s)")
+    parser.add_argument('--server', metavar='URL',
+                        help="read from an agenda service instead of the database (GUI and agenda only)")
+    commands = parser.add_subparsers(dest='command')
+    agenda_cmd = commands.add_parser('agenda', help="print the events of one day")
+    agenda_cmd.add_argument('--date', dest='day', type=parse_date, default=None,
+                            help="day to show (YYYY-MM-DD, default: today)")
+    import_cmd = commands.add_parser('import', help="import events from an .ics or .csv file")
+    import_cmd.add_argument('file')
+    export_cmd = commands.add_parser('export', help="export events to an .ics file")
+    export_cmd.add_argument('file')
+    export_cmd.add_argument('--from', dest='first', type=parse_date,
+                            help="expand occurrences from this date (YYYY-MM-DD) instead of writing RRULEs")
+    export_cmd.add_argument('--to', dest='last', type=parse_date, help="last date of the expanded range")
+    free_cmd = commands.add_parser('free', help="list free time windows over a date range")
+    free_cmd.add_argument('--from', dest='first', type=parse_date, default=None, help="first day (default: today)")
+    free_cmd.add_argument('--to', dest='last', type=parse_date, default=None,
+                          help="last day (default: three weeks after the first)")
+    free_cmd.add_argument('--duration', type=int, default=60, help="minimum length in minutes (default: %(default)s)")
+    free_cmd.add_argument('--start', type=parse_time, default=9 * 60, help="earliest time of day (default: 09:00)")
+    free_cmd.add_argument('--end', type=parse_time, default=17 * 60, help="latest time of day (default: 17:00)")
+    free_cmd.add_argument('--all-days', action='store_true', help="include weekends")
+    free_cmd.add_argument('--location', help="only events at this location count as busy")
+    free_cmd.add_argument('--category', help="only events in this category count as busy")
+    free_cmd.add_argument('--first', dest='first_only', action='store_true', help="print only the first window")
+    archive_cmd = commands.add_parser('archive', help="move finished events to the archive and compact the database")
+    archive_cmd.add_argument('--before', dest='day', type=parse_date, default=None,
+                             help="archive events whose last occurrence is before this day (default: today)")
+    serve_cmd = commands.add_parser('serve', help="serve the schedule read-only over HTTP/JSON")
+    serve_cmd.add_argument('--host', default='127.0.0.1', help="address to listen on (default: %(default)s)")
+    serve_cmd.add_argument('--port', type=int, default=8750, help="port to listen on (default: %(default)s)")
+    return parser
+
+
+def print_agenda(day, rules):
+    print(day.strftime('%A, %d %B %Y'))
+    for rule in rules:
+        print(f"  {rule.time}  {rule.course}  ({rule.location})")
+    if not rules:
+        print("  No events.")
+
+
+def run(args, parser):
+    if args.command == 'export' and (args.first is None) != (args.last is None):
+        parser.error("--from and --to must be given together")
+    if args.command == 'free':
+        # The same checks as the Find Free Time window.
+        if args.duration <= 0:
+            parser.error("--duration must be a positive number of minutes")
+        if args.end <= args.start:
+            parser.error("--end must be later than --start")
+        if args.last is not None and args.last < (args.first or date.today()):
+            parser.error("--to must not be before --from")
+    if args.server is not None:
+        if args.command != 'agenda':
+            parser.error("--server only applies to the GUI and the agenda command")
+        from .remote import RemoteError, RemoteEventSource
+        day = args.day or date.today()
+        try:
+            rules = RemoteEventSource(args.server).on_date(day)
+        except RemoteError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print_agenda(day, rules)
+        return 0
+    if args.command == 'serve':
+        import asyncio
+        from .service import AgendaService, serve
+        service = AgendaService(args.db)
+        print(f"Serving {args.db} on http://{args.host}:{args.port}", file=sys.stderr)
+        try:
+            asyncio.run(serve(service, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+        return 0
+    db = ConnectionManager(args.db)
+    conn = db.reader()
+    try:
+        if args.command == 'agenda':
+            from .db import rules_on
+            day = args.day or date.today()
+            print_agenda(day, rules_on(conn, day))
+        elif args.command == 'free':
+            from .freeslots import WORKDAYS, find_free_slots, format_minutes
+            from .store import EventStore
+            store = EventStore(conn)
+            store.load()
+            first = args.first or date.today()
+            last = args.last or first + timedelta(weeks=3)
+            slots = find_free_slots(store, first, last, args.duration, args.start, args.end,
+                                    range(7) if args.all_days else WORKDAYS, args.location, args.category,
+                                    1 if args.first_only else None)
+            for day, start, end in slots:
+                print(f"{day.strftime('%a %Y-%m-%d')}  {format_minutes(start)}-{format_minutes(end)}")
+            if not slots:
+                print("No free window found.")
+        elif args.command == 'import':
+            from .ics import import_file, import_summary
+            stats = import_file(db, args.file,
+                                lambda count: print(f"\rImported {count} events", end="", file=sys.stderr))
+            print("\r" + import_summary(stats), file=sys.stderr)
+        elif args.command == 'archive':
+            from .archive import archive_finished
+            moved = archive_finished(db, args.day)
+            print(f"Archived {moved} events.", file=sys.stderr)
+        elif args.command == 'export':
+            from .ics import export_file
+            count = export_file(conn, args.file, args.first, args.last)
+            print(f"Exported {count} events.", file=sys.stderr)
+    finally:
+        db.close()
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    return run(args, parser)
@@ -0,0 +1,64 @@
+from bisect import bisect_left
+from datetime import timedelta
+
+from . import perf
+
+# Open-ended recurrences are checked this far ahead of their first occurrence.
+HORIZON_DAYS = 366
+MAX_CONFLICTS = 50
+
+
+def occurrence_interval(rule, day):
+    # Half-open [start, end) in absolute minutes. Events without a duration
+    # occupy their starting minute, so two of them clash only when they coincide.
+    start = day.toordinal() * 1440 + rule.minutes
+    return start, start + max(rule.duration or 0, 1)
+
+
+class IntervalIndex:
+    # Static interval index over sorted start times. Knowing the longest interval,
+    # everything overlapping [start, end) starts within [start - longest, end), so a
+    # query is two bisections plus a scan of that window.
+    def __init__(self, intervals):
+        self.items = sorted(intervals, key=lambda item: item[0])
+        self.starts = [item[0] for item in self.items]
+        self.longest = max((end - start for start, end, _ in self.items), default=0)
+
+    def overlapping(self, start, end):
+        lo = bisect_left(self.starts, start - self.longest)
+        hi = bisect_left(self.starts, end)
+        return [payload for s, e, payload in self.items[lo:hi] if e > start]
+
+
+@perf.instrument('conflicts.find')
+def find_conflicts(store, candidate, horizon_days=HORIZON_DAYS, limit=MAX_CONFLICTS):
+    # Returns (date, rule) pairs of existing occurrences that overlap an occurrence
+    # of candidate, in date order; candidate.id (when editing) is ignored. The
+    # candidate's occurrences go into an IntervalIndex and the existing occurrences
+    # of those days are queried against it, stopping once limit clashes are found.
+    if candidate.minutes is None:
+        return []
+    last = candidate.end
+    if (last - candidate.start).days > horizon_days:
+        last = candidate.start + timedelta(days=horizon_days)
+    days = set(candidate.dates_between(candidate.start, last))
+    if not days:
+        return []
+    index = IntervalIndex(occurrence_interval(candidate, day) + (day,) for day in days)
+    lookup = set(days)
+    if candidate.minutes < store.engine.longest:
+        # Events of the previous evening may still be running.
+        lookup.update(day - timedelta(days=1) for day in days)
+    # And the candidate itself may run into the following days.
+    spill = (candidate.minutes + max(candidate.duration or 0, 1) - 1) // 1440
+    for n in range(1, spill + 1):
+        lookup.update(day + timedelta(days=n) for day in days)
+    conflicts = []
+    for day in sorted(lookup):
+        for rule in store.on_date(day):
+            if rule.id != candidate.id and rule.minutes is not None and \
+                    index.overlapping(*occurrence_interval(rule, day)):
+                conflicts.append((day, rule))
+        if len(conflicts) >= limit:
+            break
+    return conflicts[:limit]
@@ -0,0 +1,166 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from . import perf
+from .db import DB_PATH, migrate_schema
+
+# Applied to every connection. WAL lets the readers run while the writer commits;
+# with WAL, synchronous=NORMAL only syncs at checkpoints and stays crash-safe.
+PRAGMAS = [
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),  # KiB, i.e. 16 MB of page cache per connection
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),  # ms; only another process can still hold the write lock
+]
+STATEMENT_CACHE = 256  # prepared statements kept per connection (sqlite3 default: 128)
+
+
+def open_connection(path=DB_PATH, readonly=False, check_same_thread=True):
+    if readonly:
+        target, uri = Path(path).resolve().as_uri() + "?mode=ro", True
+    else:
+        target, uri = path, False
+    conn = sqlite3.connect(target, uri=uri, factory=perf.TimedConnection, cached_statements=STATEMENT_CACHE,
+                           check_same_thread=check_same_thread)
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionManager:
+    # One writer connection owned by a dedicated thread, plus a read-only connection
+    # per reading thread. Writes are submitted as jobs, job(conn), and return a Future
+    # with the job's result. The writer drains whatever is queued (waiting up to
+    # BATCH_WINDOW for stragglers) and runs it in one transaction, each job under its
+    # own savepoint so a failing job is rolled back alone. Jobs must not commit.
+    BATCH_WINDOW = 0.005
+    MAX_BATCH = 500
+
+    def __init__(self, path=DB_PATH, migrate=True):
+        self.path = path
+        self.local = threading.local()
+        self.writer = open_connection(path, check_same_thread=False)
+        self.writer.execute("PRAGMA journal_mode = WAL")
+        if migrate:
+            migrate_schema(self.writer)
+        self.writer.isolation_level = None  # transactions are managed by _run_batch
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self.thread.start()
+
+    def reader(self):
+        # The calling thread's connection; sqlite3 connections stay on their thread.
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = open_connection(self.path, readonly=True)
+        return conn
+
+    def write(self, job):
+        future = Future()
+        self.jobs.put((future, job, True))
+        return future
+
+    def maintain(self, job):
+        # Like write(), but job runs on its own outside any transaction, as VACUUM must.
+        future = Future()
+        self.jobs.put((future, job, False))
+        return future
+
+    def execute(self, sql, parameters=()):
+        # Shortcut for a single statement; the Future gives its lastrowid.
+        return self.write(lambda conn: conn.execute(sql, parameters).lastrowid)
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join()
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def _run(self):
+        held = None  # a maintenance job that ended the previous batch
+        while True:
+            if held is not None:
+                item, held = held, None
+            else:
+                item = self.jobs.get()
+            if item is None:
+                break
+            if not item[2]:
+                self._run_alone(item)
+                continue
+            batch = [item]
+            deadline = time.monotonic() + self.BATCH_WINDOW
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    item = self.jobs.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.jobs.put(None)  # finish this batch, then stop
+                    break
+                if not item[2]:
+                    held = item
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+        self.writer.close()
+
+    def _run_alone(self, item):
+        future, job, _ = item
+        if not future.set_running_or_notify_cancel():
+            return
+        started = time.perf_counter()
+        try:
+            result = job(self.writer)
+        except Exception as e:
+            if self.writer.in_transaction:
+                self.writer.execute("ROLLBACK")
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        if perf.enabled:
+            perf.record('db.maintenance', time.perf_counter() - started)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        conn = self.writer
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, job, _ in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, job(conn), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    results.append((future, None, e))
+                conn.execute("RELEASE job")
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Nothing in the batch was committed; fail every job that is still waiting,
+            # including those never started (e.g. BEGIN timed out on another process's lock).
+            results = []
+            for future, _, _ in batch:
+                if future.done():
+                    continue
+                if not future.running():
+                    future.set_running_or_notify_cancel()
+                results.append((future, None, e))
+        if perf.enabled:
+            perf.record('db.write_batch', time.perf_counter() - started, len(batch))
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,240 @@
+import sqlite3
+from datetime import datetime, date
+
+from . import perf
+from .recurrence import RecurrenceRule
+
+
+DB_PATH = 'college_schedule.db'
+SCHEMA_VERSION = 5
+
+# The columns of the original table; EVENT_COLUMNS adds the optional duration (minutes).
+BASE_COLUMNS = ("id, date, course, time, location, notes, category, "
+                "recurrence_type, recurrence_end, recurrence_days, reminder_time")
+EVENT_COLUMNS = BASE_COLUMNS + ", duration"
+EVENT_FIELDS = [name.strip() for name in EVENT_COLUMNS.split(',')]
+
+# Normalized columns derived from the text fields on every write:
+# start_ordinal/last_ordinal are date ordinals (last_ordinal = OPEN_ENDED for
+# recurrences without an end), start_minutes is minutes since midnight and
+# weekday_mask has bit n set for weekday n (Monday = 0).
+OPEN_ENDED = date.max.toordinal()
+
+INSERT_EVENT_SQL = '''
+    INSERT INTO schedule (date, course, time, location, notes, category, recurrence_type, recurrence_end, recurrence_days, reminder_time,
+                          duration, start_ordinal, last_ordinal, start_minutes, weekday_mask)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+'''
+
+UPDATE_EVENT_SQL = '''
+    UPDATE schedule SET date=?, course=?, time=?, location=?, notes=?, category=?, recurrence_type=?, recurrence_end=?, recurrence_days=?, reminder_time=?,
+                        duration=?, start_ordinal=?, last_ordinal=?, start_minutes=?, weekday_mask=?
+    WHERE id=?
+'''
+
+
+def normalized_columns(row):
+    # row uses the EVENT_COLUMNS layout; the id is not needed.
+    rule = RecurrenceRule.from_row(row)
+    if rule is None:
+        return (None, None, None, 0)
+    mask = 0
+    for wd in rule.weekdays:
+        mask |= 1 << wd
+    return (rule.start.toordinal(), rule.end.toordinal(), rule.minutes, mask)
+
+
+def event_values(date_val, course, time_str, location, notes, category, rec_type, rec_end, rec_days, reminder,
+                 duration=None):
+    # Parameters for INSERT_EVENT_SQL (and UPDATE_EVENT_SQL, minus the trailing id).
+    data = (date_val, course, time_str, location, notes, category, rec_type, rec_end, rec_days, reminder, duration)
+    columns = normalized_columns((None,) + data)
+    if columns[2] is not None:
+        # Times are stored zero-padded ("9:05" -> "09:05"), as the form shows them.
+        data = data[:2] + ("%02d:%02d" % divmod(columns[2], 60),) + data[3:]
+    return data + columns
+
+
+def _migrate_v2(conn):
+    existing = {col[1] for col in conn.execute("PRAGMA table_info(schedule)")}
+    for name in ('start_ordinal', 'last_ordinal', 'start_minutes', 'weekday_mask'):
+        if name not in existing:
+            conn.execute(f"ALTER TABLE schedule ADD COLUMN {name} INTEGER")
+    # Older versions stored blank reminders as text; keep numbers, drop the rest.
+    conn.execute('''
+        UPDATE schedule SET reminder_time = CASE
+            WHEN trim(reminder_time) != '' AND trim(reminder_time) NOT GLOB '*[^0-9]*'
+            THEN CAST(trim(reminder_time) AS INTEGER) ELSE NULL END
+        WHERE typeof(reminder_time) = 'text'
+    ''')
+    rows = conn.execute(f"SELECT {BASE_COLUMNS} FROM schedule").fetchall()
+    conn.executemany('''
+        UPDATE schedule SET start_ordinal=?, last_ordinal=?, start_minutes=?, weekday_mask=? WHERE id=?
+    ''', (normalized_columns(row) + (row[0],) for row in rows))
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_start ON schedule (start_ordinal, start_minutes)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_last ON schedule (last_ordinal)")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_schedule_reminder ON schedule (last_ordinal)
+        WHERE reminder_time IS NOT NULL
+    ''')
+
+
+def _migrate_v3(conn):
+    # Full-text index over the searchable columns, kept in sync by triggers. SQLite
+    # builds without FTS5 skip it; search_events then falls back to LIKE.
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS schedule_fts USING fts5(
+                course, location, notes, category, content='schedule', content_rowid='id')
+        ''')
+    except sqlite3.OperationalError:
+        return
+    for statement in FTS_TRIGGERS:
+        conn.execute(statement)
+    conn.execute("INSERT INTO schedule_fts(schedule_fts) VALUES ('rebuild')")
+
+
+FTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS schedule_fts_insert AFTER INSERT ON schedule BEGIN
+        INSERT INTO schedule_fts (rowid, course, location, notes, category)
+        VALUES (new.id, new.course, new.location, new.notes, new.category);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS schedule_fts_delete AFTER DELETE ON schedule BEGIN
+        INSERT INTO schedule_fts (schedule_fts, rowid, course, location, notes, category)
+        VALUES ('delete', old.id, old.course, old.location, old.notes, old.category);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS schedule_fts_update AFTER UPDATE OF course, location, notes, category ON schedule BEGIN
+        INSERT INTO schedule_fts (schedule_fts, rowid, course, location, notes, category)
+        VALUES ('delete', old.id, old.course, old.location, old.notes, old.category);
+        INSERT INTO schedule_fts (rowid, course, location, notes, category)
+        VALUES (new.id, new.course, new.location, new.notes, new.category);
+    END
+    ''',
+]
+
+
+def _migrate_v4(conn):
+    existing = {col[1] for col in conn.execute("PRAGMA table_info(schedule)")}
+    if 'duration' not in existing:
+        conn.execute("ALTER TABLE schedule ADD COLUMN duration INTEGER")
+
+
+def _migrate_v5(conn):
+    # Finished events moved out of the live table by archive.archive_finished. The
+    # original id is kept, but ids can be reused in schedule, so it is not the key.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schedule_archive (
+            archive_id INTEGER PRIMARY KEY,
+            id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            course TEXT NOT NULL,
+            time TEXT NOT NULL,
+            location TEXT NOT NULL,
+            notes TEXT,
+            category TEXT,
+            recurrence_type TEXT,
+            recurrence_end TEXT,
+            recurrence_days TEXT,
+            reminder_time INTEGER,
+            duration INTEGER,
+            start_ordinal INTEGER,
+            last_ordinal INTEGER,
+            archived_at TEXT NOT NULL
+        )
+    ''')
+
+
+MIGRATIONS = [
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+]
+
+
+def migrate_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schedule (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            course TEXT NOT NULL,
+            time TEXT NOT NULL,
+            location TEXT NOT NULL,
+            notes TEXT,
+            category TEXT,
+            recurrence_type TEXT,
+            recurrence_end TEXT,
+            recurrence_days TEXT,
+            reminder_time INTEGER
+        )
+    ''')
+    conn.commit()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    # Each step runs in one transaction together with the version bump, so an
+    # interrupted upgrade is retried from the same step on the next start.
+    for target, step in MIGRATIONS:
+        if version < target:
+            conn.execute("BEGIN")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            version = target
+
+
+def connect(path=DB_PATH, migrate=True):
+    conn = sqlite3.connect(path, factory=perf.TimedConnection)
+    if migrate:
+        migrate_schema(conn)
+    return conn
+
+
+def validate_event(date_val, course, time_str, location, reminder="", duration=""):
+    # Raises ValueError with a user-facing message for the first invalid field.
+    if not date_val or not course or not time_str or not location:
+        raise ValueError("Date, Course, Time, and Location are required.")
+    try:
+        datetime.strptime(date_val, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("Date must be in YYYY-MM-DD format.")
+    try:
+        datetime.strptime(time_str, "%H:%M")
+    except ValueError:
+        raise ValueError("Time must be in HH:MM format (24-hour).")
+    if reminder and not reminder.isdigit():
+        raise ValueError("Reminder must be a whole number of minutes.")
+    if duration and not duration.isdigit():
+        raise ValueError("Duration must be a whole number of minutes.")
+
+
+@perf.instrument('db.rules_on')
+def rules_on(conn, day):
+    # Events occurring on one day, read through the ordinal indexes instead of
+    # loading the whole table; weekly rules are narrowed by their weekday mask.
+    ordinal = day.toordinal()
+    rows = conn.execute(f'''
+        SELECT {EVENT_COLUMNS} FROM schedule
+        WHERE start_ordinal <= ? AND last_ordinal >= ? AND (weekday_mask = 0 OR weekday_mask & ?)
+    ''', (ordinal, ordinal, 1 << day.weekday()))
+    rules = [rule for rule in map(RecurrenceRule.from_row, rows) if rule is not None and rule.occurs_on(day)]
+    rules.sort(key=RecurrenceRule.sort_key)
+    return rules
+
+
+@perf.instrument('db.load_reminder_rules')
+def load_reminder_rules(conn, today=None):
+    # Served by the partial index on last_ordinal; finished events are never read.
+    today = today or date.today()
+    rows = conn.execute(f"SELECT {EVENT_COLUMNS} FROM schedule WHERE reminder_time IS NOT NULL AND last_ordinal >= ?",
+                        (today.toordinal(),))
+    return [rule for rule in map(RecurrenceRule.from_row, rows) if rule is not None]
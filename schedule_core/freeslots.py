@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from . import perf
+
+WORKDAYS = (0, 1, 2, 3, 4)
+
+
+def _matches(rule, location, category):
+    if location and (rule.location or "").strip().lower() != location.strip().lower():
+        return False
+    if category and (rule.category or "").strip().lower() != category.strip().lower():
+        return False
+    return True
+
+
+class RangeDays:
+    # The on_date lookup of find_free_slots over (date, rule) pairs fetched in one
+    # go, e.g. by a single between() call instead of one request per day.
+    def __init__(self, pairs):
+        self.by_day = {}
+        for day, rule in pairs:
+            self.by_day.setdefault(day, []).append(rule)
+
+    def on_date(self, day):
+        return self.by_day.get(day, ())
+
+
+@perf.instrument('freeslots.find')
+def find_free_slots(store, first, last, duration, day_start=9 * 60, day_end=17 * 60, weekdays=WORKDAYS,
+                    location=None, category=None, limit=None):
+    # Free windows of at least duration minutes between day_start and day_end (minutes
+    # since midnight) on the given weekdays from first to last, as (date, start, end)
+    # tuples in order. Only events matching location/category count as busy.
+    #
+    # One sweep over the days: each day's occurrences become busy intervals, and
+    # whatever runs past midnight is carried into the next day before the day's
+    # busy intervals are merged and their complement within the window is taken.
+    slots = []
+    carried = []
+    day = first - timedelta(days=1)
+    while day <= last:
+        busy = [(start - 1440, end - 1440) for start, end in carried if end > 1440]
+        carried = []
+        for rule in store.on_date(day):
+            if rule.minutes is None or not _matches(rule, location, category):
+                continue
+            interval = (rule.minutes, rule.minutes + max(rule.duration or 0, 1))
+            busy.append(interval)
+            if interval[1] > 1440:
+                carried.append(interval)
+        if day >= first and day.weekday() in weekdays:
+            cursor = day_start
+            for start, end in sorted(busy):
+                if end <= cursor:
+                    continue
+                if start >= day_end:
+                    break
+                if start - cursor >= duration:
+                    slots.append((day, cursor, start))
+                cursor = max(cursor, end)
+            if day_end - cursor >= duration:
+                slots.append((day, cursor, day_end))
+            if limit is not None and len(slots) >= limit:
+                return slots[:limit]
+        day += timedelta(days=1)
+    return slots
+
+
+def format_minutes(minutes):
+    return "%02d:%02d" % divmod(minutes, 60)
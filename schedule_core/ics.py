@@ -0,0 +1,345 @@
+import csv
+import re
+from datetime import datetime, date, timedelta, timezone
+
+from .db import EVENT_COLUMNS, INSERT_EVENT_SQL, event_values
+from .recurrence import WEEKDAY_NAMES, RecurrenceRule
+
+# -------------------- Import --------------------
+
+IMPORT_BATCH = 5000
+
+ICS_FREQ = {'DAILY': "Daily", 'WEEKLY': "Weekly", 'MONTHLY': "Monthly", 'YEARLY': "Yearly"}
+ICS_DAYS = dict(zip(['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU'], WEEKDAY_NAMES))
+ICS_RRULE_PARTS = {'FREQ', 'INTERVAL', 'UNTIL', 'COUNT', 'BYDAY', 'BYMONTHDAY', 'BYMONTH', 'WKST'}
+ICS_DURATION = re.compile(r'^([-+]?)P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+CSV_FIELDS = ('date', 'course', 'time', 'location', 'notes', 'category',
+              'recurrence_type', 'recurrence_end', 'recurrence_days', 'reminder_time', 'duration')
+
+
+def _ics_unfold(lines):
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t'):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _ics_property(line):
+    quoted = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ':' and not quoted:
+            break
+    else:
+        return line.upper(), {}, ''
+    name, *raw_params = line[:i].split(';')
+    params = {}
+    for param in raw_params:
+        key, _, value = param.partition('=')
+        params[key.upper()] = value.strip('"')
+    return name.upper(), params, line[i + 1:]
+
+
+def _ics_text(value):
+    return re.sub(r'\\([\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value).strip()
+
+
+def _ics_datetime(params, value):
+    # Floating and TZID times are taken as local wall-clock time; UTC times are converted.
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value[:8], '%Y%m%d').strftime('%Y-%m-%d'), "00:00"
+    moment = datetime.strptime(value[:15], '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        moment = moment.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d'), moment.strftime('%H:%M')
+
+
+def _ics_rrule(value, date_str, time_str):
+    # Maps an RRULE onto recurrence_type/recurrence_end/recurrence_days, or raises
+    # ValueError for rules the schedule table cannot represent.
+    parts = dict(part.split('=', 1) for part in value.upper().split(';') if '=' in part)
+    rec_type = ICS_FREQ.get(parts.get('FREQ'))
+    start = datetime.strptime(date_str, '%Y-%m-%d').date()
+    if rec_type is None or parts.get('INTERVAL', '1') != '1' or set(parts) - ICS_RRULE_PARTS:
+        raise ValueError(value)
+    if parts.get('BYMONTHDAY', str(start.day)) != str(start.day):
+        raise ValueError(value)
+    if parts.get('BYMONTH', str(start.month)) != str(start.month):
+        raise ValueError(value)
+    rec_days = ""
+    if 'BYDAY' in parts:
+        if rec_type not in ("Daily", "Weekly"):
+            raise ValueError(value)
+        days = [ICS_DAYS[code] for code in parts['BYDAY'].split(',')]
+        if days == [WEEKDAY_NAMES[start.weekday()]]:
+            rec_type = "Weekly"
+        elif len(set(days)) == 7:
+            rec_type = "Daily"
+        else:
+            rec_type = "Weekly (Specific Days)"
+            rec_days = ",".join(days)
+    rec_end = ""
+    if 'UNTIL' in parts:
+        rec_end = datetime.strptime(parts['UNTIL'][:8], '%Y%m%d').strftime('%Y-%m-%d')
+    elif 'COUNT' in parts:
+        rule = RecurrenceRule.from_row((None, date_str, "", time_str, "", "", "", rec_type, "", rec_days, None))
+        rec_end = _ics_count_end(rule, int(parts['COUNT'])).strftime('%Y-%m-%d')
+    return rec_type, rec_end, rec_days
+
+
+def _ics_count_end(rule, count):
+    # Date of the count-th occurrence. Daily and weekly patterns repeat every week,
+    # so it is computed directly; months and years are stepped, which ends at
+    # date.max after at most ~120k steps. Raises OverflowError past date.max.
+    if count < 1:
+        raise ValueError(count)
+    if rule.rec_type in ("Monthly", "Yearly"):
+        day = rule.start
+        for _ in range(count - 1):
+            day = rule.next_on_or_after(day + timedelta(days=1))
+            if day is None:
+                raise OverflowError(count)
+        return day
+    if rule.rec_type == "Daily":
+        return rule.start + timedelta(days=count - 1)
+    offsets = sorted((wd - rule.start.weekday()) % 7 for wd in rule.weekdays)
+    first = rule.next_on_or_after(rule.start)
+    offsets = [offset - (first - rule.start).days for offset in offsets]
+    weeks, index = divmod(count - 1, len(offsets))
+    return first + timedelta(weeks=weeks, days=offsets[index])
+
+
+def _ics_minutes(value):
+    # Signed length of an ICS duration in whole minutes (seconds round up), or None.
+    match = ICS_DURATION.match(value.strip())
+    if not match:
+        return None
+    weeks, days, hours, minutes, seconds = (int(g or 0) for g in match.groups()[1:])
+    total = (weeks * 7 + days) * 1440 + hours * 60 + minutes + (seconds + 59) // 60
+    return -total if match.group(1) == '-' else total
+
+
+def _ics_reminder(params, value):
+    minutes = _ics_minutes(value)
+    if params.get('RELATED', 'START') != 'START' or minutes is None or minutes > 0:
+        return None
+    return -minutes
+
+
+def _ics_duration(props, date_str, time_str):
+    # All-day events get no duration, so they do not block the whole day.
+    params, value = props['DTSTART']
+    if params.get('VALUE') == 'DATE' or len(value.strip()) == 8:
+        return None
+    if 'DURATION' in props:
+        minutes = _ics_minutes(props['DURATION'][1])
+    elif 'DTEND' in props:
+        end = datetime.strptime(" ".join(_ics_datetime(*props['DTEND'])), '%Y-%m-%d %H:%M')
+        minutes = int((end - datetime.strptime(f"{date_str} {time_str}", '%Y-%m-%d %H:%M')).total_seconds() // 60)
+    else:
+        return None
+    return minutes if minutes and minutes > 0 else None
+
+
+def _ics_event(props):
+    date_str, time_str = _ics_datetime(*props['DTSTART'])
+    text = {name: _ics_text(props[name][1]) if name in props else ""
+            for name in ('SUMMARY', 'LOCATION', 'DESCRIPTION', 'CATEGORIES')}
+    rec_type, rec_end, rec_days = "None", "", ""
+    if 'RRULE' in props:
+        rec_type, rec_end, rec_days = _ics_rrule(props['RRULE'][1], date_str, time_str)
+    reminder = _ics_reminder(*props['TRIGGER']) if 'TRIGGER' in props else None
+    return (date_str, text['SUMMARY'] or "Untitled", time_str, text['LOCATION'], text['DESCRIPTION'],
+            text['CATEGORIES'], rec_type, rec_end, rec_days, reminder, _ics_duration(props, date_str, time_str))
+
+
+def read_ics(lines, stats):
+    # Yields one event tuple (the INSERT_EVENT_SQL fields before the derived ones) per VEVENT.
+    props = None
+    in_alarm = False
+    for line in _ics_unfold(lines):
+        name, params, value = _ics_property(line)
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            props = {}
+        elif props is None:
+            continue
+        elif name == 'BEGIN' and value.upper() == 'VALARM':
+            in_alarm = True
+        elif name == 'END' and value.upper() == 'VALARM':
+            in_alarm = False
+        elif name == 'END' and value.upper() == 'VEVENT':
+            try:
+                event = _ics_event(props)
+            except (KeyError, ValueError, OverflowError):
+                stats['skipped'] += 1
+            else:
+                # A row has no way to hold exception dates: the event is imported
+                # without them (a cancelled holiday shows up as a class) and counted.
+                if 'EXDATE' in props or 'RDATE' in props:
+                    stats['exceptions'] += 1
+                yield event
+            props = None
+        elif in_alarm:
+            if name == 'TRIGGER':
+                props.setdefault('TRIGGER', (params, value))
+        else:
+            props.setdefault(name, (params, value))
+
+
+def read_csv(lines, stats):
+    # Columns are matched by header name (see CSV_FIELDS); only date, course, time
+    # and location are required.
+    for record in csv.DictReader(lines):
+        record = {key.strip().lower(): (value or "").strip()
+                  for key, value in record.items() if key is not None}
+        data = [record.get(field, "") for field in CSV_FIELDS]
+        data[6] = data[6] or "None"
+        data[9] = int(data[9]) if data[9].isdigit() else None
+        data[10] = int(data[10]) if data[10].isdigit() else None
+        yield tuple(data)
+
+
+def import_events(db, events, stats, progress=None):
+    # Writes in batches of IMPORT_BATCH rows through db (a ConnectionManager), one
+    # write job per batch, each waited for so progress reports committed rows.
+    batch = []
+    for data in events:
+        values = event_values(*data)
+        if not data[1] or values[11] is None or values[13] is None:
+            stats['skipped'] += 1
+            continue
+        batch.append(values)
+        if len(batch) >= IMPORT_BATCH:
+            _import_batch(db, batch, stats, progress)
+    _import_batch(db, batch, stats, progress)
+    return stats
+
+
+def _import_batch(db, batch, stats, progress):
+    if not batch:
+        return
+    rows = list(batch)
+    db.write(lambda conn: conn.executemany(INSERT_EVENT_SQL, rows)).result()
+    stats['imported'] += len(rows)
+    del batch[:]
+    if progress:
+        progress(stats['imported'])
+
+
+def import_file(db, path, progress=None):
+    stats = {'imported': 0, 'skipped': 0, 'exceptions': 0}
+    reader = read_csv if path.lower().endswith('.csv') else read_ics
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return import_events(db, reader(f, stats), stats, progress)
+
+
+def import_summary(stats):
+    text = f"Imported {stats['imported']} events, skipped {stats['skipped']}."
+    if stats['exceptions']:
+        text += (f" {stats['exceptions']} had EXDATE/RDATE exceptions, which are not supported;"
+                 " those dates were imported as regular occurrences.")
+    return text
+
+# -------------------- Export --------------------
+
+ICS_CODES = {name: code for code, name in ICS_DAYS.items()}
+ICS_RRULE = {"Daily": "FREQ=DAILY", "Weekly": "FREQ=WEEKLY", "Weekly (Specific Days)": "FREQ=WEEKLY",
+             "Monthly": "FREQ=MONTHLY", "Yearly": "FREQ=YEARLY"}
+
+
+def _ics_escape(text):
+    return (text or "").replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_fold(line):
+    # Lines longer than 75 octets are folded without splitting a UTF-8 sequence.
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while len(encoded) > limit:
+        cut = limit
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _ics_vevent(rule, stamp, day=None):
+    # DTSTART always counts as an occurrence (RFC 5545), so a recurring event starts
+    # on its first actual occurrence, e.g. the first ticked weekday.
+    first = day or rule.next_on_or_after(rule.start)
+    start = datetime.combine(first, datetime.min.time()) + timedelta(minutes=rule.minutes)
+    lines = ["BEGIN:VEVENT",
+             f"UID:{rule.id}{'-' + day.strftime('%Y%m%d') if day else ''}@college-schedule",
+             f"DTSTAMP:{stamp}",
+             f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}",
+             f"SUMMARY:{_ics_escape(rule.course)}",
+             f"LOCATION:{_ics_escape(rule.location)}"]
+    if rule.duration:
+        lines.append(f"DURATION:PT{rule.duration}M")
+    if rule.notes:
+        lines.append(f"DESCRIPTION:{_ics_escape(rule.notes)}")
+    if rule.category:
+        lines.append(f"CATEGORIES:{_ics_escape(rule.category)}")
+    if day is None and rule.rec_type in ICS_RRULE:
+        rrule = ICS_RRULE[rule.rec_type]
+        if rule.rec_type == "Weekly (Specific Days)":
+            rrule += ";BYDAY=" + ",".join(ICS_CODES[WEEKDAY_NAMES[wd]] for wd in sorted(rule.weekdays))
+        if rule.end != date.max:
+            rrule += f";UNTIL={rule.end.strftime('%Y%m%d')}T235959"
+        lines.append(f"RRULE:{rrule}")
+    if rule.reminder is not None:
+        lines += ["BEGIN:VALARM", "ACTION:DISPLAY", f"DESCRIPTION:{_ics_escape(rule.course)}",
+                  f"TRIGGER:-PT{rule.reminder}M", "END:VALARM"]
+    lines.append("END:VEVENT")
+    return "".join(_ics_fold(line) + "\r\n" for line in lines)
+
+
+def export_ics(conn, f, first=None, last=None):
+    # Rows are streamed off the cursor and written one VEVENT at a time. Without a range
+    # every event is written once with its RRULE; with first/last each occurrence in the
+    # range becomes its own VEVENT.
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//College Schedule Reminder Pro//EN\r\n")
+    if first is None:
+        cursor = conn.execute(f"SELECT {EVENT_COLUMNS} FROM schedule")
+    else:
+        cursor = conn.execute(f"SELECT {EVENT_COLUMNS} FROM schedule WHERE start_ordinal <= ? AND last_ordinal >= ?",
+                              (last.toordinal(), first.toordinal()))
+    count = 0
+    for row in cursor:
+        rule = RecurrenceRule.from_row(row)
+        if rule is None or rule.minutes is None:
+            continue
+        if first is None:
+            if rule.next_on_or_after(rule.start) is None:
+                continue  # ends before its first occurrence
+            f.write(_ics_vevent(rule, stamp))
+            count += 1
+        else:
+            for day in rule.dates_between(first, last):
+                f.write(_ics_vevent(rule, stamp, day))
+                count += 1
+    f.write("END:VCALENDAR\r\n")
+    return count
+
+
+def export_file(conn, path, first=None, last=None):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        return export_ics(conn, f, first, last)
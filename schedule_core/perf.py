@@ -0,0 +1,185 @@
+import functools
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Opt-in latency recording for the hot paths. Enable with SCHEDULE_PERF=1 or
+# set_enabled(True); while disabled every hook reduces to one global check.
+ENV_VAR = 'SCHEDULE_PERF'
+BUCKETS_PER_OCTAVE = 4  # histogram resolution: ~19% wide buckets on a log scale
+SLOWEST_KEPT = 25
+
+enabled = os.environ.get(ENV_VAR, '') not in ('', '0')
+
+_lock = threading.Lock()
+_metrics = {}
+_slowest = []  # min-heap of (seconds, seq, call); holds the SLOWEST_KEPT slowest calls
+_seq = 0
+
+
+class Metric:
+    __slots__ = ('count', 'total', 'max', 'rows', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.buckets = {}  # bucket index -> count
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log2(micros) * BUCKETS_PER_OCTAVE)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the requested rank, in seconds.
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(2 ** ((index + 1) / BUCKETS_PER_OCTAVE) / 1e6, self.max)
+        return self.max
+
+
+def set_enabled(value):
+    global enabled
+    enabled = bool(value)
+
+
+def reset():
+    global _seq
+    with _lock:
+        _metrics.clear()
+        del _slowest[:]
+        _seq = 0
+
+
+def record(name, seconds, rows=None):
+    global _seq
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric()
+        metric.add(seconds)
+        if rows is not None:
+            metric.rows += rows
+        _seq += 1
+        if len(_slowest) < SLOWEST_KEPT or seconds > _slowest[0][0]:
+            call = {'name': name, 'seconds': seconds, 'rows': rows,
+                    'at': datetime.now().isoformat(timespec='milliseconds')}
+            entry = (seconds, _seq, call)
+            if len(_slowest) < SLOWEST_KEPT:
+                heapq.heappush(_slowest, entry)
+            else:
+                heapq.heapreplace(_slowest, entry)
+
+
+def add_rows(name, rows):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is not None:
+            metric.rows += rows
+
+
+def instrument(name):
+    # Decorator recording the wall time of every call under name.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    with _lock:
+        metrics = {
+            name: {
+                'count': m.count,
+                'rows': m.rows,
+                'total': m.total,
+                'mean': m.total / m.count,
+                'p50': m.percentile(0.50),
+                'p95': m.percentile(0.95),
+                'p99': m.percentile(0.99),
+                'max': m.max,
+            }
+            for name, m in _metrics.items()
+        }
+        slowest = [call for _, _, call in sorted(_slowest, reverse=True)]
+    return {'enabled': enabled, 'metrics': metrics, 'slowest': slowest}
+
+
+def dump_json(path):
+    with open(path, 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+
+# -------------------- SQL instrumentation --------------------
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def sql_name(sql):
+    statement = _WHITESPACE.sub(' ', sql).strip()
+    return "sql: " + (statement if len(statement) <= 80 else statement[:77] + "...")
+
+
+class TimedCursor(sqlite3.Cursor):
+    last_name = None
+
+    def execute(self, sql, parameters=()):
+        if not enabled:
+            return super().execute(sql, parameters)
+        self.last_name = sql_name(sql)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record(self.last_name, time.perf_counter() - started,
+                   self.rowcount if self.rowcount >= 0 else None)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not enabled:
+            return super().executemany(sql, seq_of_parameters)
+        self.last_name = sql_name(sql)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record(self.last_name, time.perf_counter() - started,
+                   self.rowcount if self.rowcount >= 0 else None)
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if enabled and self.last_name:
+            add_rows(self.last_name, len(rows))
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    # Routes every statement, including the execute() shortcuts, through TimedCursor.
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+
+def month_key(day):
+    return day.year, day.month
+
+
+def shift_month(key, months):
+    year, month = divmod(key[0] * 12 + key[1] - 1 + months, 12)
+    return year, month + 1
+
+
+def month_grid(key):
+    # The days a month view can show: the weeks around the month, spill-over included.
+    first = date(key[0], key[1], 1)
+    grid_start = first - timedelta(days=first.weekday() + 7)
+    return grid_start, grid_start + timedelta(days=7 * 8)
+
+
+class MonthPrefetcher:
+    # Expands calendar months on a small thread pool and keeps the last CACHE_MONTHS
+    # of them. Lookups go to source, which has the on_date/between interface of
+    # EventStore and must be usable from worker threads: a StoreSnapshot (the
+    # in-memory store, read without locking) or a RemoteEventSource. Requests come
+    # from the Tk thread; results are handed to deliver(callback, *args), which the GUI
+    # points at root.after so callbacks run on the Tk thread again.
+    #
+    # Only the latest month and day request get an answer: older queued jobs are
+    # cancelled, and results that arrive for a superseded request, or from before the
+    # last invalidate(), are dropped. Months within RADIUS of the requested one are
+    # expanded as well so that paging back and forth is served from the cache. Day
+    # lookups have a worker of their own so they never queue behind a month.
+    CACHE_MONTHS = 12
+    WORKERS = 2
+    RADIUS = 1
+
+    def __init__(self, deliver, source, workers=WORKERS):
+        self.deliver = deliver
+        self.source = source
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self.day_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch-day')
+        self.months = OrderedDict()  # month key -> {date: tuple of rules sorted by time}
+        self.pending = {}  # month key -> Future
+        self.generation = 0
+        self.month_request = None  # (month key, callback) awaiting its month
+        self.day_request = None  # (ticket, callback)
+        self.day_future = None
+        self.day_tickets = 0
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.day_pool.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self):
+        # After a write: forget every expanded month and ignore whatever is in flight.
+        # Outstanding requests are dropped too; callers re-request what they show.
+        self.generation += 1
+        self.months.clear()
+        self.month_request = None
+        self.day_request = None
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def cached_day(self, day):
+        for key in (month_key(day), *self.months):
+            by_day = self.months.get(key)
+            if by_day is not None:
+                first, last = month_grid(key)
+                if first <= day <= last:
+                    self.months.move_to_end(key)
+                    return by_day.get(day, ())
+        return None
+
+    def request_month(self, key, callback):
+        # callback(by_day, error) gets the month's {date: rules}, immediately if it is cached.
+        self.month_request = None
+        by_day = self.months.get(key)
+        if by_day is not None:
+            self.months.move_to_end(key)
+            callback(by_day, None)
+        else:
+            self.month_request = (key, callback)
+        self._prefetch(key)
+
+    def request_day(self, day, callback):
+        # callback(rules, error); served from an expanded month when possible, otherwise
+        # by an indexed query on the pool.
+        self.day_tickets += 1
+        if self.day_future is not None:
+            self.day_future.cancel()
+            self.day_future = None
+        rules = self.cached_day(day)
+        if rules is not None:
+            self.day_request = None
+            callback(rules, None)
+            return
+        self.day_request = (self.day_tickets, callback)
+        self.day_future = self._submit(self.day_pool, self._read_day, day, self._day_done, self.day_tickets)
+
+    def _prefetch(self, key):
+        wanted = [key] + [shift_month(key, step * sign) for step in range(1, self.RADIUS + 1) for sign in (1, -1)]
+        for stale in [k for k in self.pending if k not in wanted]:
+            # Too late to cancel when already running; the result is still cached.
+            self.pending.pop(stale).cancel()
+        for k in wanted:
+            if k not in self.months and k not in self.pending:
+                self.pending[k] = self._submit(self.pool, self._read_month, k, self._month_done, k, self.generation)
+
+    def _submit(self, pool, work, arg, done, *context):
+        def finished(future):
+            if not self.closed:
+                self.deliver(done, future, *context)
+        future = pool.submit(work, arg)
+        future.add_done_callback(finished)
+        return future
+
+    def _read_month(self, key):
+        by_day = {}
+        for day, rule in self.source.between(*month_grid(key)):
+            by_day.setdefault(day, []).append(rule)
+        return {day: tuple(rules) for day, rules in by_day.items()}
+
+    def _read_day(self, day):
+        return tuple(self.source.on_date(day))
+
+    def _month_done(self, future, key, generation):
+        if self.pending.get(key) is future:
+            del self.pending[key]
+        if future.cancelled() or generation != self.generation:
+            return
+        error = future.exception()
+        if error is None:
+            self.months[key] = future.result()
+            self.months.move_to_end(key)
+            while len(self.months) > self.CACHE_MONTHS:
+                self.months.popitem(last=False)
+        if self.month_request is not None and self.month_request[0] == key:
+            callback = self.month_request[1]
+            self.month_request = None
+            callback(self.months.get(key), error)
+
+    def _day_done(self, future, ticket):
+        if future.cancelled() or self.day_request is None or self.day_request[0] != ticket:
+            return
+        callback = self.day_request[1]
+        self.day_request = None
+        error = future.exception()
+        callback(None if error else future.result(), error)
@@ -0,0 +1,257 @@
+from datetime import datetime, date, timedelta
+
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+NON_RECURRING = (None, "", "None")
+# Ranges shorter than this are expanded day by day from the engine's buckets,
+# which beats stepping every rule for a month view.
+BUCKET_RANGE_DAYS = 92
+
+
+class RecurrenceRule:
+    # Pre-parsed form of one schedule row, so date matching never touches strings.
+    __slots__ = ('id', 'start', 'end', 'rec_type', 'weekdays', 'time', 'minutes', 'course',
+                 'location', 'notes', 'category', 'reminder', 'duration')
+
+    @classmethod
+    def from_row(cls, row):
+        # row indices:
+        # 0=id, 1=date, 2=course, 3=time, 4=location, 5=notes, 6=category,
+        # 7=recurrence_type, 8=recurrence_end, 9=recurrence_days, 10=reminder_time,
+        # 11=duration (optional)
+        try:
+            start = datetime.strptime(row[1], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return None
+        rule = cls()
+        rule.id = row[0]
+        rule.start = start
+        rule.course = row[2]
+        rule.time = row[3]
+        try:
+            parsed = datetime.strptime(row[3], '%H:%M')
+            rule.minutes = parsed.hour * 60 + parsed.minute
+        except (TypeError, ValueError):
+            rule.minutes = None
+        rule.location = row[4]
+        rule.notes = row[5]
+        rule.category = row[6]
+        rec_type = row[7].strip() if row[7] else None
+        rule.rec_type = None if rec_type in NON_RECURRING else rec_type
+        rule.end = start
+        if rule.rec_type is not None:
+            rule.end = date.max
+            if row[8]:
+                try:
+                    rule.end = datetime.strptime(row[8], '%Y-%m-%d').date()
+                except ValueError:
+                    pass
+        rule.weekdays = ()
+        if rule.rec_type == "Weekly":
+            rule.weekdays = (start.weekday(),)
+        elif rule.rec_type == "Weekly (Specific Days)":
+            names = [d.strip() for d in row[9].split(',')] if row[9] else []
+            rule.weekdays = tuple(WEEKDAY_NAMES.index(n) for n in names if n in WEEKDAY_NAMES)
+            if not rule.weekdays:
+                # No days ticked: fall back to the weekday of the first occurrence.
+                rule.weekdays = (start.weekday(),)
+        rule.reminder = None
+        if row[10] is not None and str(row[10]).strip() != "":
+            try:
+                rule.reminder = int(row[10])
+            except ValueError:
+                rule.reminder = 0
+        rule.duration = None
+        if len(row) > 11 and row[11] is not None and str(row[11]).strip().isdigit():
+            rule.duration = int(row[11])
+        return rule
+
+    def to_row(self):
+        # Back to the from_row layout, e.g. to send a rule to another process.
+        return (self.id, self.start.isoformat(), self.course, self.time, self.location, self.notes, self.category,
+                self.rec_type or "None",
+                self.end.isoformat() if self.rec_type is not None and self.end != date.max else "",
+                ",".join(WEEKDAY_NAMES[d] for d in self.weekdays) if self.rec_type == "Weekly (Specific Days)" else "",
+                self.reminder, self.duration)
+
+    def sort_key(self):
+        # Time of day, then id; rules with an unreadable time come first.
+        return (-1 if self.minutes is None else self.minutes, self.id)
+
+    def occurs_on(self, day):
+        if day < self.start or day > self.end:
+            return False
+        if self.rec_type is None:
+            return day == self.start
+        if self.rec_type == "Daily":
+            return True
+        if self.weekdays:
+            return day.weekday() in self.weekdays
+        if self.rec_type == "Monthly":
+            return day.day == self.start.day
+        if self.rec_type == "Yearly":
+            return (day.month, day.day) == (self.start.month, self.start.day)
+        return day == self.start
+
+    def next_on_or_after(self, day):
+        # First occurrence date >= day, found by stepping the pattern rather than every date.
+        day = max(day, self.start)
+        if day > self.end:
+            return None
+        found = None
+        if self.rec_type is None:
+            found = day if day == self.start else None
+        elif self.rec_type == "Daily":
+            found = day
+        elif self.weekdays:
+            found = min(day + timedelta(days=(wd - day.weekday()) % 7) for wd in self.weekdays)
+        elif self.rec_type == "Monthly":
+            year, month = day.year, day.month
+            if day.day > self.start.day:
+                year, month = year + month // 12, month % 12 + 1
+            for _ in range(48):
+                try:
+                    found = date(year, month, self.start.day)
+                    break
+                except ValueError:
+                    year, month = year + month // 12, month % 12 + 1
+        elif self.rec_type == "Yearly":
+            year = day.year
+            if (day.month, day.day) > (self.start.month, self.start.day):
+                year += 1
+            for offset in range(8):
+                try:
+                    found = date(year + offset, self.start.month, self.start.day)
+                    break
+                except ValueError:
+                    continue
+        else:
+            found = day if day == self.start else None
+        if found is None or found > self.end:
+            return None
+        return found
+
+    def dates_between(self, first, last):
+        # Occurrence dates in [first, last], stepped arithmetically per pattern.
+        first = max(first, self.start)
+        last = min(last, self.end)
+        if first > last:
+            return
+        if self.rec_type == "Daily":
+            for offset in range((last - first).days + 1):
+                yield first + timedelta(days=offset)
+        elif self.weekdays:
+            week = timedelta(days=7)
+            for wd in self.weekdays:
+                day = first + timedelta(days=(wd - first.weekday()) % 7)
+                while day <= last:
+                    yield day
+                    day += week
+        elif self.rec_type == "Monthly":
+            year, month = first.year, first.month
+            while (year, month) <= (last.year, last.month):
+                try:
+                    day = date(year, month, self.start.day)
+                    if first <= day <= last:
+                        yield day
+                except ValueError:
+                    pass
+                year, month = year + month // 12, month % 12 + 1
+        elif self.rec_type == "Yearly":
+            for year in range(first.year, last.year + 1):
+                try:
+                    day = date(year, self.start.month, self.start.day)
+                except ValueError:
+                    continue
+                if first <= day <= last:
+                    yield day
+        elif first <= self.start <= last:
+            yield self.start
+
+    def next_occurrence_after(self, moment):
+        # First occurrence (as a datetime) starting strictly after moment.
+        if self.minutes is None:
+            return None
+        day = moment.date()
+        while True:
+            try:
+                day = self.next_on_or_after(day)
+            except OverflowError:
+                return None
+            if day is None:
+                return None
+            occurrence = datetime.combine(day, datetime.min.time()) + timedelta(minutes=self.minutes)
+            if occurrence > moment:
+                return occurrence
+            if day == date.max:
+                return None
+            day += timedelta(days=1)
+
+
+class RecurrenceEngine:
+    # Rules are bucketed by what they can match, so a date lookup only visits
+    # the handful of rules that could possibly occur on that date.
+    def __init__(self):
+        self.rules = {}
+        self.one_off = {}       # date -> {id: rule}
+        self.daily = {}         # id -> rule
+        self.by_weekday = {}    # weekday -> {id: rule}
+        self.by_monthday = {}   # day of month -> {id: rule}
+        self.by_yearday = {}    # (month, day) -> {id: rule}
+        self.longest = 1        # longest duration seen (minutes); never shrinks
+
+    def load(self, rows):
+        self.__init__()
+        for row in rows:
+            self.add_row(row)
+
+    def add_row(self, row):
+        rule = RecurrenceRule.from_row(row)
+        if rule is not None:
+            self.add(rule)
+        return rule
+
+    def add(self, rule):
+        self.remove(rule.id)
+        self.rules[rule.id] = rule
+        self.longest = max(self.longest, rule.duration or 1)
+        for bucket in self._buckets(rule):
+            bucket[rule.id] = rule
+
+    def remove(self, event_id):
+        rule = self.rules.pop(event_id, None)
+        if rule is None:
+            return None
+        for bucket in self._buckets(rule):
+            bucket.pop(event_id, None)
+        return rule
+
+    def _buckets(self, rule):
+        if rule.rec_type == "Daily":
+            return [self.daily]
+        if rule.weekdays:
+            return [self.by_weekday.setdefault(wd, {}) for wd in rule.weekdays]
+        if rule.rec_type == "Monthly":
+            return [self.by_monthday.setdefault(rule.start.day, {})]
+        if rule.rec_type == "Yearly":
+            return [self.by_yearday.setdefault((rule.start.month, rule.start.day), {})]
+        return [self.one_off.setdefault(rule.start, {})]
+
+    def occurrences_on(self, day):
+        candidates = []
+        for bucket in (self.one_off.get(day), self.daily, self.by_weekday.get(day.weekday()),
+                       self.by_monthday.get(day.day), self.by_yearday.get((day.month, day.day))):
+            if bucket:
+                candidates.extend(r for r in bucket.values() if r.start <= day <= r.end)
+        candidates.sort(key=RecurrenceRule.sort_key)
+        return candidates
+
+    def occurrences_between(self, first, last):
+        # Expands every rule over [first, last] in a single pass; returns (date, rule) pairs.
+        if 0 <= (last - first).days < BUCKET_RANGE_DAYS:
+            days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+            return [(day, rule) for day in days for rule in self.occurrences_on(day)]
+        found = [(day, rule) for rule in self.rules.values()
+                 for day in rule.dates_between(first, last)]
+        found.sort(key=lambda pair: (pair[0], pair[1].sort_key()))
+        return found
@@ -0,0 +1,130 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+
+from . import perf
+
+
+class ReminderScheduler:
+    # Keeps a heap of upcoming reminder deadlines and sleeps until the earliest one.
+    # Entries are invalidated lazily: a rule's current entry is tracked in self.tokens
+    # and snoozed entries in self.snoozes, anything else popped off the heap is stale
+    # and discarded. Everything due within COALESCE seconds of the first due entry
+    # is handed to on_due as one list of (rule, occurrence) pairs. self.fired keeps the
+    # last occurrence delivered per rule across load/upsert, so a reload inside the
+    # lead window does not schedule that occurrence again.
+    MAX_SLEEP = 900
+    COALESCE = 60
+
+    def __init__(self, on_due):
+        self.on_due = on_due
+        self.heap = []
+        self.tokens = {}
+        self.snoozes = {}  # token -> rule id
+        self.fired = {}  # rule id -> last delivered occurrence
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+
+    @perf.instrument('reminders.load')
+    def load(self, rules):
+        rules = list(rules)
+        with self.cond:
+            # Snoozed reminders outlive a reload, unless their rule is gone.
+            by_id = {rule.id: rule for rule in rules}
+            self.heap = [(fire_at, token, by_id[rule.id], occurrence)
+                         for fire_at, token, rule, occurrence in self.heap
+                         if token in self.snoozes and rule.id in by_id]
+            heapq.heapify(self.heap)
+            self.tokens = {}
+            self.snoozes = {token: rule_id for token, rule_id in self.snoozes.items() if rule_id in by_id}
+            fired, self.fired = self.fired, {}
+            now = datetime.now()
+            for rule in rules:
+                if rule.id in fired:
+                    self.fired[rule.id] = fired[rule.id]
+                self._push(rule, now)
+            self.cond.notify()
+
+    def upsert(self, rule):
+        with self.cond:
+            self._forget(rule.id)
+            self._push(rule, datetime.now())
+            self.cond.notify()
+
+    def remove(self, event_id):
+        with self.cond:
+            self._forget(event_id)
+            self.fired.pop(event_id, None)
+            self.cond.notify()
+
+    def snooze(self, rule, occurrence, minutes):
+        # Shows the reminder again in minutes, on top of the rule's regular schedule.
+        with self.cond:
+            token = next(self.counter)
+            self.snoozes[token] = rule.id
+            heapq.heappush(self.heap, (datetime.now() + timedelta(minutes=minutes), token, rule, occurrence))
+            self.cond.notify()
+
+    def _forget(self, event_id):
+        self.tokens.pop(event_id, None)
+        for token in [token for token, rule_id in self.snoozes.items() if rule_id == event_id]:
+            del self.snoozes[token]
+
+    def _live(self, entry):
+        return self.tokens.get(entry[2].id) == entry[1] or entry[1] in self.snoozes
+
+    def _push(self, rule, after):
+        if rule.reminder is None:
+            return
+        occurrence = rule.next_occurrence_after(max(after, self.fired.get(rule.id, after)))
+        if occurrence is None:
+            return
+        # Reminders whose lead time has already started fire immediately.
+        fire_at = occurrence - timedelta(minutes=rule.reminder)
+        token = next(self.counter)
+        self.tokens[rule.id] = token
+        heapq.heappush(self.heap, (fire_at, token, rule, occurrence))
+
+    def _run(self):
+        with self.cond:
+            while self.running:
+                while self.heap and not self._live(self.heap[0]):
+                    heapq.heappop(self.heap)
+                if not self.heap:
+                    self.cond.wait()
+                    continue
+                now = datetime.now()
+                delay = (self.heap[0][0] - now).total_seconds()
+                if delay > 0:
+                    self.cond.wait(min(delay, self.MAX_SLEEP))
+                    continue
+                due = []
+                window_end = now + timedelta(seconds=self.COALESCE)
+                while self.heap and self.heap[0][0] <= window_end:
+                    entry = heapq.heappop(self.heap)
+                    if not self._live(entry):
+                        continue
+                    fire_at, token, rule, occurrence = entry
+                    if perf.enabled:
+                        perf.record('reminders.lateness', max((now - fire_at).total_seconds(), 0))
+                    if self.snoozes.pop(token, None) is None:
+                        del self.tokens[rule.id]
+                        self.fired[rule.id] = occurrence
+                        if rule.rec_type is not None:
+                            self._push(rule, occurrence)
+                    due.append((rule, occurrence))
+                if due:
+                    self.on_due(due)
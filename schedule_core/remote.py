@@ -0,0 +1,88 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlencode
+
+from .db import EVENT_FIELDS
+from .recurrence import RecurrenceRule
+
+
+class RemoteError(Exception):
+    pass
+
+
+class RemoteEventSource:
+    # Reads a schedule from an agenda service (schedule_core.service) behind the
+    # on_date/between interface of EventStore, so the GUI can show a served schedule.
+    # Responses are kept with their ETag and revalidated with If-None-Match, so an
+    # unchanged day costs a 304 and no parsing. Safe to use from several threads.
+    TIMEOUT = 10
+    CACHE_SIZE = 256
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()  # path -> (etag, decoded response)
+
+    def get(self, path, **params):
+        if params:
+            path += "?" + urlencode(params)
+        with self.lock:
+            cached = self.cache.get(path)
+        request = urllib.request.Request(self.base_url + path, headers={'Accept': 'application/json'})
+        if cached is not None:
+            request.add_header('If-None-Match', cached[0])
+        try:
+            with urllib.request.urlopen(request, timeout=self.TIMEOUT) as response:
+                etag = response.headers.get('ETag')
+                data = self._decode(json.load(response))
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                return cached[1]
+            try:
+                message = json.load(e).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise RemoteError(f"{self.base_url}{path}: {message}") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise RemoteError(f"{self.base_url}: {getattr(e, 'reason', e)}") from None
+        if etag:
+            with self.lock:
+                self.cache[path] = (etag, data)
+                self.cache.move_to_end(path)
+                if len(self.cache) > self.CACHE_SIZE:
+                    self.cache.popitem(last=False)
+        return data
+
+    def _decode(self, data):
+        # Events become RecurrenceRules once, when the response is first received.
+        if 'events' in data:
+            rules = [RecurrenceRule.from_row(tuple(event.get(name) for name in EVENT_FIELDS))
+                     for event in data['events']]
+            data['events'] = [rule for rule in rules if rule is not None]
+        return data
+
+    def on_date(self, day):
+        return tuple(self.get(f"/day/{day.isoformat()}")['events'])
+
+    def between(self, first, last):
+        data = self.get("/range", **{'from': first.isoformat(), 'to': last.isoformat()})
+        if 'pairs' not in data:
+            by_id = {rule.id: rule for rule in data['events']}
+            data['pairs'] = [(datetime.strptime(day, '%Y-%m-%d').date(), by_id[event_id])
+                             for day, event_id in data['occurrences'] if event_id in by_id]
+        return data['pairs']
+
+    def reminder_rules(self):
+        return list(self.get("/reminders")['events'])
+
+    def search(self, text, archive=False):
+        # (results, archived) rows of (id, date, time, course), as search_events returns them.
+        data = self.get("/search", q=text, archive=int(archive))
+        return [tuple(row) for row in data['results']], [tuple(row) for row in data['archived']]
+
+    def version(self):
+        return self.get("/version")['version']
@@ -0,0 +1,46 @@
+import re
+
+
+SEARCH_LIMIT = 200
+
+
+def _search_tokens(text):
+    return re.findall(r'\w+', text)
+
+
+def has_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'schedule_fts'").fetchone() is not None
+
+
+def search_events(conn, text, limit=SEARCH_LIMIT):
+    # Returns (id, date, time, course) rows, best matches first. Every word is
+    # matched as a prefix; course titles weigh most, then location, category, notes.
+    tokens = _search_tokens(text)
+    if not tokens:
+        return []
+    if has_fts(conn):
+        query = " ".join(f'"{token}"*' for token in tokens)
+        return conn.execute('''
+            SELECT s.id, s.date, s.time, s.course FROM schedule_fts
+            JOIN schedule s ON s.id = schedule_fts.rowid
+            WHERE schedule_fts MATCH ?
+            ORDER BY bm25(schedule_fts, 10.0, 5.0, 1.0, 2.0)
+            LIMIT ?
+        ''', (query, limit)).fetchall()
+    return _like_search(conn, 'schedule', tokens, "start_ordinal", limit)
+
+
+def search_archive(conn, text, limit=SEARCH_LIMIT):
+    # Same rows from schedule_archive, most recent first. The archive is only
+    # searched on request, so it has no full-text index to keep up to date.
+    tokens = _search_tokens(text)
+    if not tokens:
+        return []
+    return _like_search(conn, 'schedule_archive', tokens, "start_ordinal DESC", limit)
+
+
+def _like_search(conn, table, tokens, order, limit):
+    where = " AND ".join(["(course LIKE ? OR location LIKE ? OR notes LIKE ? OR category LIKE ?)"] * len(tokens))
+    params = [f"%{token}%" for token in tokens for _ in range(4)]
+    return conn.execute(f"SELECT id, date, time, course FROM {table} WHERE {where} ORDER BY {order} LIMIT ?",
+                        params + [limit]).fetchall()
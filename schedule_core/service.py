@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from . import perf
+from .connections import ConnectionManager
+from .db import DB_PATH, EVENT_FIELDS, load_reminder_rules
+from .search import SEARCH_LIMIT, search_archive, search_events
+from .store import EventStore
+
+# Read-only HTTP/JSON view of a schedule database for many clients, on asyncio
+# streams so it needs nothing outside the standard library:
+#
+#   GET /day/2025-02-10                   {"date", "events": [event]}
+#   GET /range?from=2025-02-01&to=...     {"from", "to", "events": [event], "occurrences": [[date, id]]}
+#   GET /search?q=stat&archive=1          {"query", "results": [[id, date, time, course]], "archived": [...]}
+#   GET /reminders                        {"events": [event]}  (events with a reminder still to come)
+#   GET /version                          {"version"}  (changes whenever the data does)
+#
+# An event is an object keyed by the EVENT_COLUMNS names. Every response carries an
+# ETag and is answered with 304 Not Modified when If-None-Match matches it.
+DEFAULT_PORT = 8750
+MAX_RANGE_DAYS = 366
+RESPONSE_CACHE = 512
+
+
+def event_json(rule):
+    return dict(zip(EVENT_FIELDS, rule.to_row()))
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_day(value, name):
+    try:
+        return datetime.strptime(value or "", '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a date (YYYY-MM-DD)")
+
+
+class AgendaService:
+    # All database and EventStore work runs on one worker thread (EventStore is not
+    # thread-safe), so the store's day cache is the occurrence cache shared by every
+    # request. Rendered responses are kept per URL as well. Both are dropped when
+    # PRAGMA data_version shows that another connection, e.g. a desktop app writing
+    # to the same file, has committed.
+    def __init__(self, path=DB_PATH):
+        self.db = ConnectionManager(path)
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agenda')
+        self.started = datetime.now().strftime('%Y%m%d%H%M%S')
+        self.store = None
+        self.data_version = None
+        self.generation = 0
+        self.responses = OrderedDict()  # request target -> (etag, body)
+        self.clients = set()  # StreamWriters of open connections
+        self.routes = {
+            'day': self.day,
+            'range': self.range,
+            'search': self.search,
+            'reminders': self.reminders,
+            'version': self.version,
+        }
+
+    def close(self):
+        self.worker.shutdown()
+        self.db.close()
+
+    def disconnect(self):
+        # Ends the open (kept-alive) connections; their handlers then return.
+        for writer in list(self.clients):
+            writer.close()
+
+    def _sync(self):
+        conn = self.db.reader()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self.store is not None and version == self.data_version:
+            return
+        if self.store is None:
+            self.store = EventStore(conn)
+        self.store.load()
+        self.data_version = version
+        self.generation += 1
+        self.responses.clear()
+
+    @perf.instrument('service.render')
+    def render(self, target):
+        # Runs on the worker thread; returns (etag, body) or raises HTTPError.
+        self._sync()
+        cached = self.responses.get(target)
+        if cached is not None:
+            self.responses.move_to_end(target)
+            return cached
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        handler = self.routes.get(parts[0]) if parts else None
+        if handler is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no such endpoint: {url.path}")
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        body = json.dumps(handler(parts[1:], query), separators=(',', ':')).encode('utf-8')
+        cached = ('"%s"' % hashlib.sha1(body).hexdigest()[:20], body)
+        self.responses[target] = cached
+        if len(self.responses) > RESPONSE_CACHE:
+            self.responses.popitem(last=False)
+        return cached
+
+    def day(self, args, query):
+        if len(args) != 1:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "expected /day/YYYY-MM-DD")
+        day = _parse_day(args[0], "day")
+        return {'date': day.isoformat(), 'events': [event_json(rule) for rule in self.store.on_date(day)]}
+
+    def range(self, args, query):
+        first = _parse_day(query.get('from'), "from")
+        last = _parse_day(query.get('to'), "to")
+        if last < first or (last - first).days > MAX_RANGE_DAYS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"to must be within {MAX_RANGE_DAYS} days after from")
+        # Day by day, so overlapping ranges share the store's day cache.
+        events = {}
+        occurrences = []
+        day = first
+        while day <= last:
+            for rule in self.store.on_date(day):
+                events.setdefault(rule.id, rule)
+                occurrences.append([day.isoformat(), rule.id])
+            day += timedelta(days=1)
+        return {'from': first.isoformat(), 'to': last.isoformat(),
+                'events': [event_json(rule) for rule in events.values()], 'occurrences': occurrences}
+
+    def search(self, args, query):
+        text = query.get('q', "")
+        try:
+            limit = int(query.get('limit', SEARCH_LIMIT))
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "limit must be a positive number")
+        limit = min(limit, SEARCH_LIMIT)
+        conn = self.db.reader()
+        archived = search_archive(conn, text, limit) if query.get('archive') == '1' else []
+        return {'query': text, 'results': [list(row) for row in search_events(conn, text, limit)],
+                'archived': [list(row) for row in archived]}
+
+    def reminders(self, args, query):
+        return {'events': [event_json(rule) for rule in load_reminder_rules(self.db.reader())]}
+
+    def version(self, args, query):
+        return {'version': f"{self.started}-{self.generation}"}
+
+    async def handle(self, reader, writer):
+        # One client connection; HTTP/1.1 keep-alive, GET and HEAD only.
+        loop = asyncio.get_running_loop()
+        self.clients.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                request = lines[0].split(' ')
+                keep_alive = (len(request) == 3 and request[2] == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                etag = None
+                if len(request) != 3 or headers.get('content-length', '0') != '0':
+                    status, body, keep_alive = HTTPStatus.BAD_REQUEST, {'error': "malformed request"}, False
+                elif request[0] not in ('GET', 'HEAD'):
+                    status, body = HTTPStatus.METHOD_NOT_ALLOWED, {'error': "read-only service"}
+                else:
+                    try:
+                        etag, body = await loop.run_in_executor(self.worker, self.render, request[1])
+                        status = HTTPStatus.OK
+                    except HTTPError as e:
+                        status, body = e.status, {'error': str(e)}
+                    except Exception as e:
+                        status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+                if isinstance(body, dict):
+                    body = json.dumps(body).encode('utf-8')
+                if etag is not None and etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+                    status, body = HTTPStatus.NOT_MODIFIED, b""
+                response = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+                            f"Content-Length: {len(body)}", "Cache-Control: no-cache",
+                            "Connection: " + ("keep-alive" if keep_alive else "close")]
+                if etag is not None:
+                    response.append(f"ETag: {etag}")
+                writer.write(("\r\n".join(response) + "\r\n\r\n").encode('latin-1'))
+                if request[0] != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=DEFAULT_PORT):
+    server = await asyncio.start_server(service.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+class LocalServer:
+    # Runs an AgendaService on its own event loop thread, for tests and for trying
+    # the remote mode on one machine:
+    #
+    #     with LocalServer("college_schedule.db") as server:
+    #         RemoteEventSource(server.url).on_date(date.today())
+    def __init__(self, path=DB_PATH, host='127.0.0.1', port=0):
+        self.service = AgendaService(path)
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='agenda-server', daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            self.service.close()
+            raise self.error
+        return self
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.service.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            server = self.loop.run_until_complete(asyncio.start_server(self.service.handle, self.host, self.port))
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            self.service.disconnect()
+            self.loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(self.loop), return_exceptions=True))
+            self.loop.close()
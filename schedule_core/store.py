@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+from . import perf
+from .db import EVENT_COLUMNS
+from .recurrence import RecurrenceEngine
+
+
+class EventStore:
+    # Loads the schedule table once and keeps it in a RecurrenceEngine. Writes are
+    # applied as per-event deltas and only the cached dates they touch are dropped.
+    # Only the owning thread changes the engine, and it does so holding self.lock;
+    # its own reads need no lock, while StoreSnapshot reads from other threads take it.
+    CACHE_SIZE = 400
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.engine = RecurrenceEngine()
+        self.day_cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.edits = 0  # refresh/discard calls so far, to spot edits during a rebuild
+
+    @perf.instrument('store.load')
+    def load(self):
+        self.install(self.build(self.conn))
+
+    @perf.instrument('store.build')
+    def build(self, conn):
+        # A new engine for the whole table. Touches nothing in the store, so it can run
+        # on a worker thread with that thread's own connection; install() it afterwards.
+        engine = RecurrenceEngine()
+        engine.load(conn.execute(f"SELECT {EVENT_COLUMNS} FROM schedule"))
+        return engine
+
+    def install(self, engine):
+        with self.lock:
+            self.engine = engine
+        self.day_cache.clear()
+
+    def refresh(self, event_id):
+        # Re-read one row after it was inserted or updated.
+        row = self.conn.execute(f"SELECT {EVENT_COLUMNS} FROM schedule WHERE id = ?", (event_id,)).fetchone()
+        with self.lock:
+            old = self.engine.remove(event_id)
+            new = self.engine.add_row(row) if row else None
+        self.edits += 1
+        self._invalidate(old, new)
+        return new
+
+    def discard(self, event_id):
+        with self.lock:
+            old = self.engine.remove(event_id)
+        self.edits += 1
+        self._invalidate(old)
+
+    def _invalidate(self, *rules):
+        rules = [rule for rule in rules if rule is not None]
+        for day in [day for day in self.day_cache if any(rule.occurs_on(day) for rule in rules)]:
+            del self.day_cache[day]
+
+    @perf.instrument('store.on_date')
+    def on_date(self, day):
+        result = self.day_cache.get(day)
+        if result is not None:
+            self.day_cache.move_to_end(day)
+            return result
+        result = tuple(self.engine.occurrences_on(day))
+        self.day_cache[day] = result
+        if len(self.day_cache) > self.CACHE_SIZE:
+            self.day_cache.popitem(last=False)
+        return result
+
+    @perf.instrument('store.between')
+    def between(self, first, last):
+        return self.engine.occurrences_between(first, last)
+
+
+class StoreSnapshot:
+    # The EventStore lookups for worker threads: each call reads the store's engine
+    # under its lock and bypasses its day cache, which belongs to the store's thread.
+    def __init__(self, store):
+        self.store = store
+
+    def on_date(self, day):
+        with self.store.lock:
+            return tuple(self.store.engine.occurrences_on(day))
+
+    def between(self, first, last):
+        with self.store.lock:
+            return self.store.engine.occurrences_between(first, last)
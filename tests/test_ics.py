@@ -0,0 +1,70 @@
+import io
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule_core.db import INSERT_EVENT_SQL, event_values, migrate_schema
+from schedule_core.ics import export_ics, read_ics
+
+
+def import_vevent(*lines):
+    stats = {'imported': 0, 'skipped': 0, 'exceptions': 0}
+    events = list(read_ics(["BEGIN:VCALENDAR", "BEGIN:VEVENT", *lines, "END:VEVENT", "END:VCALENDAR"], stats))
+    return events, stats
+
+
+class RruleMappingTest(unittest.TestCase):
+    def rule(self, rrule):
+        events, stats = import_vevent("DTSTART:20250203T100000", "SUMMARY:Lab", f"RRULE:{rrule}")
+        self.assertEqual(stats['skipped'], 0)
+        return events[0][6:9]  # recurrence_type, recurrence_end, recurrence_days
+
+    def test_weekly_on_every_day_is_daily(self):
+        self.assertEqual(self.rule("FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR,SA,SU"), ("Daily", "", ""))
+        self.assertEqual(self.rule("FREQ=DAILY;BYDAY=SU,SA,FR,TH,WE,TU,MO"), ("Daily", "", ""))
+
+    def test_weekly_on_some_days(self):
+        self.assertEqual(self.rule("FREQ=WEEKLY;BYDAY=MO,WE"), ("Weekly (Specific Days)", "", "Monday,Wednesday"))
+
+    def test_weekly_on_start_day(self):
+        self.assertEqual(self.rule("FREQ=WEEKLY;BYDAY=MO"), ("Weekly", "", ""))
+
+    def test_count_sets_the_last_occurrence(self):
+        self.assertEqual(self.rule("FREQ=DAILY;COUNT=3")[1], "2025-02-05")
+        self.assertEqual(self.rule("FREQ=WEEKLY;BYDAY=TU,FR;COUNT=4")[1], "2025-02-14")
+        self.assertEqual(self.rule("FREQ=MONTHLY;COUNT=13")[1], "2026-02-03")
+
+    def test_count_past_the_calendar_is_skipped(self):
+        events, stats = import_vevent("DTSTART:20250203T100000", "SUMMARY:Lab", "RRULE:FREQ=DAILY;COUNT=3000000")
+        self.assertEqual((events, stats['skipped']), ([], 1))
+
+
+class ExportTest(unittest.TestCase):
+    def export(self, *events):
+        conn = sqlite3.connect(":memory:")
+        conn.execute('''CREATE TABLE schedule (id INTEGER PRIMARY KEY, date TEXT NOT NULL, course TEXT NOT NULL,
+                        time TEXT NOT NULL, location TEXT NOT NULL, notes TEXT, category TEXT, recurrence_type TEXT,
+                        recurrence_end TEXT, recurrence_days TEXT, reminder_time INTEGER)''')
+        migrate_schema(conn)
+        conn.executemany(INSERT_EVENT_SQL, [event_values(*event) for event in events])
+        out = io.StringIO()
+        count = export_ics(conn, out)
+        return count, [line for line in out.getvalue().split("\r\n") if line.startswith(('DTSTART', 'RRULE'))]
+
+    def test_specific_days_start_on_the_first_ticked_day(self):
+        count, lines = self.export(("2025-02-03", "Stats", "10:00", "Room 1", "", "", "Weekly (Specific Days)",
+                                    "2025-03-01", "Wednesday,Friday", None))
+        self.assertEqual(count, 1)
+        self.assertEqual(lines, ["DTSTART:20250205T100000", "RRULE:FREQ=WEEKLY;BYDAY=WE,FR;UNTIL=20250301T235959"])
+
+    def test_event_without_occurrences_is_not_exported(self):
+        count, lines = self.export(("2025-02-03", "Stats", "10:00", "Room 1", "", "", "Weekly (Specific Days)",
+                                    "2025-02-04", "Friday", None))
+        self.assertEqual((count, lines), (0, []))
+
+
+if __name__ == '__main__':
+    unittest.main()